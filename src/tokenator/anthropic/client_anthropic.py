@@ -4,7 +4,7 @@ from typing import Any, Optional, Union, overload, Iterator, AsyncIterator
 import logging
 
 from anthropic import Anthropic, AsyncAnthropic
-from anthropic.types import Message, RawMessageStartEvent, RawMessageDeltaEvent
+from anthropic.types import Message
 
 from ..models import PromptTokenDetails, TokenMetrics, TokenUsageStats
 from ..base_wrapper import BaseWrapper, ResponseType
@@ -89,18 +89,17 @@ def _create_usage_callback(execution_id, log_usage_fn):
             return
 
         usage_data = TokenUsageStats(
-            model=chunks[0].message.model
-            if isinstance(chunks[0], RawMessageStartEvent)
-            else "",
+            model=chunks[0].message.model if chunks[0].type == "message_start" else "",
             usage=TokenMetrics(),
         )
 
+        # The interceptor only keeps message_start/message_delta events
         for chunk in chunks:
-            if isinstance(chunk, RawMessageStartEvent):
+            if chunk.type == "message_start":
                 usage_data.model = chunk.message.model
                 usage_data.usage.prompt_tokens += chunk.message.usage.input_tokens
                 usage_data.usage.completion_tokens += chunk.message.usage.output_tokens
-            elif isinstance(chunk, RawMessageDeltaEvent):
+            else:
                 usage_data.usage.completion_tokens += chunk.usage.output_tokens
 
         usage_data.usage.total_tokens = (
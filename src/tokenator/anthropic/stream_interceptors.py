@@ -7,6 +7,9 @@ logger = logging.getLogger(__name__)
 
 _T = TypeVar("_T")
 
+# Only these events carry usage, so content deltas are never buffered
+_USAGE_EVENT_TYPES = frozenset({"message_start", "message_delta"})
+
 
 class AnthropicAsyncStreamInterceptor(AsyncStream[_T]):
     """
@@ -52,12 +55,16 @@ class AnthropicAsyncStreamInterceptor(AsyncStream[_T]):
             chunk = await self._base_stream.__anext__()
         except StopAsyncIteration:
             # Once the base stream is fully consumed, we can do final usage/logging.
+            # Hand the chunks off exactly once so that iterating an exhausted
+            # stream again doesn't write a second usage row.
             if self._usage_callback and self._chunks:
-                self._usage_callback(self._chunks)
+                chunks, self._chunks = self._chunks, []
+                self._usage_callback(chunks)
             raise
 
         # Intercept each chunk
-        self._chunks.append(chunk)
+        if chunk.type in _USAGE_EVENT_TYPES:
+            self._chunks.append(chunk)
         return chunk
 
     async def __aenter__(self) -> "AnthropicAsyncStreamInterceptor[_T]":
@@ -121,12 +128,16 @@ class AnthropicSyncStreamInterceptor(Stream[_T]):
             chunk = self._base_stream.__next__()
         except StopIteration:
             # Once the base stream is fully consumed, we can do final usage/logging.
+            # Hand the chunks off exactly once so that iterating an exhausted
+            # stream again doesn't write a second usage row.
             if self._usage_callback and self._chunks:
-                self._usage_callback(self._chunks)
+                chunks, self._chunks = self._chunks, []
+                self._usage_callback(chunks)
             raise
 
         # Intercept each chunk
-        self._chunks.append(chunk)
+        if chunk.type in _USAGE_EVENT_TYPES:
+            self._chunks.append(chunk)
         return chunk
 
     def __enter__(self) -> "AnthropicSyncStreamInterceptor[_T]":
@@ -1,12 +1,20 @@
 """Base wrapper class for token usage tracking."""
 
+from collections import deque
+from datetime import datetime
 from pathlib import Path
 from typing import Any, Optional, TypeVar
+import atexit
 import logging
+import math
+import threading
+import time
 import uuid
 
+from sqlalchemy import insert
+
 from .models import TokenUsageStats
-from .schemas import get_session, TokenUsage
+from .schemas import active_session_factories, get_session, TokenUsage
 from . import state
 
 from .migrations import check_and_run_migrations
@@ -15,6 +23,141 @@ logger = logging.getLogger(__name__)
 
 ResponseType = TypeVar("ResponseType")
 
+# Every usage row has the same shape, so one statement serves all flushes and
+# hits SQLAlchemy's compiled cache each time
+_TOKEN_USAGE_INSERT = insert(TokenUsage)
+
+
+class _UsageBuffer:
+    """Collects usage rows in memory and writes them in one transaction."""
+
+    def __init__(self, Session):
+        self.Session = Session
+        self._rows = deque()
+        self._lock = threading.Lock()
+        # Held for a whole write, so a flush returns only once rows are committed
+        self._write_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._pending = threading.Event()
+        self._writer = None
+        self._idle_timer = None
+        # Set once the buffer is retired, so its writer thread exits
+        self._closed = False
+
+    def add(self, row: dict) -> None:
+        # A retired buffer has no writer, so late rows are written inline
+        background = state.usage_background_writes and not self._closed
+        with self._lock:
+            self._rows.append(row)
+            due = (
+                len(self._rows) >= state.usage_flush_rows
+                or time.monotonic() - self._last_flush >= state.usage_flush_secs
+            )
+            # Start the writer on first use, or again if it has died
+            writer_down = self._writer is None or not self._writer.is_alive()
+            if due and background and writer_down:
+                self._writer = threading.Thread(
+                    target=self._write_loop, name="tokenator-usage-writer", daemon=True
+                )
+                self._writer.start()
+        if not due:
+            self._arm_idle_timer()
+            return
+        if background:
+            # Hand the commit to the writer thread instead of the caller
+            self._pending.set()
+        else:
+            self.flush()
+
+    def _arm_idle_timer(self) -> None:
+        """Flush after usage_flush_secs even if no further rows arrive."""
+        if not math.isfinite(state.usage_flush_secs):
+            return
+        with self._lock:
+            if self._idle_timer is not None or not self._rows:
+                return
+            self._idle_timer = threading.Timer(state.usage_flush_secs, self.flush)
+            self._idle_timer.daemon = True
+            self._idle_timer.start()
+
+    def _write_loop(self) -> None:
+        while not self._closed:
+            self._pending.wait()
+            self._pending.clear()
+            self.flush()
+
+    def close(self) -> None:
+        """Write any pending rows and stop the writer thread."""
+        self._closed = True
+        # Wake the writer so it sees the stop signal and exits
+        self._pending.set()
+        self.flush()
+
+    def flush(self) -> None:
+        """Write every pending row with a single executemany insert and commit."""
+        with self._write_lock:
+            with self._lock:
+                rows = list(self._rows)
+                self._rows.clear()
+                self._last_flush = time.monotonic()
+                if self._idle_timer is not None:
+                    self._idle_timer.cancel()
+                    self._idle_timer = None
+            if not rows:
+                return
+
+            session = None
+            try:
+                # Opening the session is inside the try so a connection failure
+                # is logged rather than killing the background writer
+                session = self.Session()
+                # Core executemany skips the ORM unit of work; rows aren't read back
+                session.execute(_TOKEN_USAGE_INSERT, rows)
+                session.commit()
+                logger.debug("Committed %d token usage rows", len(rows))
+            except Exception as e:
+                logger.error("Failed to log token usage: %s", str(e))
+                if session is not None:
+                    session.rollback()
+            finally:
+                if session is not None:
+                    session.close()
+
+
+# One buffer per session factory, so wrappers on the same database share batches
+_USAGE_BUFFERS = {}
+# Guards _USAGE_BUFFERS, which wrappers on any thread look up on every call
+_USAGE_BUFFERS_LOCK = threading.Lock()
+
+
+def get_usage_buffer(Session) -> _UsageBuffer:
+    """Return the usage buffer that writes through the given session factory."""
+    retired = []
+    with _USAGE_BUFFERS_LOCK:
+        buffer = _USAGE_BUFFERS.get(Session)
+        if buffer is None:
+            # Retire buffers whose session factory get_session has since replaced
+            live = set(active_session_factories())
+            retired = [
+                _USAGE_BUFFERS.pop(s) for s in list(_USAGE_BUFFERS) if s not in live
+            ]
+            buffer = _USAGE_BUFFERS.setdefault(Session, _UsageBuffer(Session))
+    # Write out retired buffers' pending rows without holding up other lookups
+    for stale in retired:
+        stale.close()
+    return buffer
+
+
+def flush_usage_buffers() -> None:
+    """Write any buffered usage rows so queries see every logged call."""
+    with _USAGE_BUFFERS_LOCK:
+        buffers = list(_USAGE_BUFFERS.values())
+    for buffer in buffers:
+        buffer.flush()
+
+
+atexit.register(flush_usage_buffers)
+
 
 class BaseWrapper:
     def __init__(self, client: Any, db_path: Optional[str] = None):
@@ -45,55 +188,66 @@ class BaseWrapper:
             )
 
     def _log_usage_impl(
-        self, token_usage_stats: TokenUsageStats, session, execution_id: str
+        self, token_usage_stats: TokenUsageStats, execution_id: str
     ) -> None:
         """Implementation of token usage logging."""
+        # Pass the model itself so it's only formatted when DEBUG is enabled
         logger.debug(
             "Logging usage for model %s: %s",
             token_usage_stats.model,
-            token_usage_stats.usage.model_dump(),
+            token_usage_stats.usage,
         )
-        try:
-            token_usage = TokenUsage(
-                execution_id=execution_id,
-                provider=self.provider,
-                model=token_usage_stats.model,
-                total_cost=0,  # This needs to be calculated based on your rates
-                prompt_tokens=token_usage_stats.usage.prompt_tokens,
-                completion_tokens=token_usage_stats.usage.completion_tokens,
-                total_tokens=token_usage_stats.usage.total_tokens,
+        usage = token_usage_stats.usage
+        prompt_details = usage.prompt_tokens_details
+        completion_details = usage.completion_tokens_details
+        # Stamp the call time now, since the row may be written in a later batch
+        now = datetime.now()
+        # Looked up per call, since a retired buffer is no longer flushed at exit
+        get_usage_buffer(self.Session).add(
+            {
+                "execution_id": execution_id,
+                "provider": self.provider,
+                "model": token_usage_stats.model,
+                "created_at": now,
+                "updated_at": now,
+                "total_cost": 0,  # This needs to be calculated based on your rates
+                "prompt_tokens": usage.prompt_tokens,
+                "completion_tokens": usage.completion_tokens,
+                "total_tokens": usage.total_tokens,
                 # Prompt details
-                prompt_cached_input_tokens=token_usage_stats.usage.prompt_tokens_details.cached_input_tokens
-                if token_usage_stats.usage.prompt_tokens_details
+                "prompt_cached_input_tokens": prompt_details.cached_input_tokens
+                if prompt_details
                 else None,
-                prompt_cached_creation_tokens=token_usage_stats.usage.prompt_tokens_details.cached_creation_tokens
-                if token_usage_stats.usage.prompt_tokens_details
+                "prompt_cached_creation_tokens": prompt_details.cached_creation_tokens
+                if prompt_details
                 else None,
-                prompt_audio_tokens=token_usage_stats.usage.prompt_tokens_details.audio_tokens
-                if token_usage_stats.usage.prompt_tokens_details
+                "prompt_audio_tokens": prompt_details.audio_tokens
+                if prompt_details
                 else None,
                 # Completion details
-                completion_audio_tokens=token_usage_stats.usage.completion_tokens_details.audio_tokens
-                if token_usage_stats.usage.completion_tokens_details
+                "completion_audio_tokens": completion_details.audio_tokens
+                if completion_details
                 else None,
-                completion_reasoning_tokens=token_usage_stats.usage.completion_tokens_details.reasoning_tokens
-                if token_usage_stats.usage.completion_tokens_details
+                "completion_reasoning_tokens": completion_details.reasoning_tokens
+                if completion_details
                 else None,
-                completion_accepted_prediction_tokens=token_usage_stats.usage.completion_tokens_details.accepted_prediction_tokens
-                if token_usage_stats.usage.completion_tokens_details
+                "completion_accepted_prediction_tokens": (
+                    completion_details.accepted_prediction_tokens
+                )
+                if completion_details
                 else None,
-                completion_rejected_prediction_tokens=token_usage_stats.usage.completion_tokens_details.rejected_prediction_tokens
-                if token_usage_stats.usage.completion_tokens_details
+                "completion_rejected_prediction_tokens": (
+                    completion_details.rejected_prediction_tokens
+                )
+                if completion_details
                 else None,
-            )
-            session.add(token_usage)
-            logger.debug(
-                "Logged token usage: model=%s, total_tokens=%d",
-                token_usage_stats.model,
-                token_usage_stats.usage.total_tokens,
-            )
-        except Exception as e:
-            logger.error("Failed to log token usage: %s", str(e))
+            }
+        )
+        logger.debug(
+            "Queued token usage: model=%s, total_tokens=%d",
+            token_usage_stats.model,
+            usage.total_tokens,
+        )
 
     def _log_usage(
         self, token_usage_stats: TokenUsageStats, execution_id: Optional[str] = None
@@ -104,20 +258,10 @@ class BaseWrapper:
             return
 
         if not execution_id:
-            execution_id = str(uuid.uuid4())
+            execution_id = uuid.uuid4().hex
 
         logger.debug("Starting token usage logging for execution_id: %s", execution_id)
-        session = self.Session()
         try:
-            try:
-                self._log_usage_impl(token_usage_stats, session, execution_id)
-                session.commit()
-                logger.debug(
-                    "Successfully committed token usage for execution_id: %s",
-                    execution_id,
-                )
-            except Exception as e:
-                logger.error("Failed to log token usage: %s", str(e))
-                session.rollback()
-        finally:
-            session.close()
+            self._log_usage_impl(token_usage_stats, execution_id)
+        except Exception as e:
+            logger.error("Failed to log token usage: %s", str(e))
@@ -118,6 +118,8 @@ class BaseGeminiWrapper(BaseWrapper):
 class AsyncGeminiWrapper:
     """Async wrapper for Gemini client to match the official SDK structure."""
 
+    __slots__ = ("wrapper", "_models")
+
     def __init__(self, wrapper: BaseGeminiWrapper):
         self.wrapper = wrapper
         self._models = None
@@ -132,6 +134,8 @@ class AsyncGeminiWrapper:
 class AsyncModelsWrapper:
     """Async wrapper for models to match the official SDK structure."""
 
+    __slots__ = ("wrapper",)
+
     def __init__(self, wrapper: BaseGeminiWrapper):
         self.wrapper = wrapper
 
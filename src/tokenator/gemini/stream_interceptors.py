@@ -34,8 +34,11 @@ class GeminiAsyncStreamInterceptor(AsyncIterator[_T]):
             chunk = await self._base_stream.__anext__()
         except StopAsyncIteration:
             # Once the base stream is fully consumed, we can do final usage/logging.
+            # Hand the chunks off exactly once so that iterating an exhausted
+            # stream again doesn't write a second usage row.
             if self._usage_callback and self._chunks:
-                self._usage_callback(self._chunks)
+                chunks, self._chunks = self._chunks, []
+                self._usage_callback(chunks)
             raise
 
         # Intercept each chunk
@@ -68,8 +71,11 @@ class GeminiSyncStreamInterceptor(Iterator[_T]):
             chunk = next(self._base_stream)
         except StopIteration:
             # Once the base stream is fully consumed, we can do final usage/logging.
+            # Hand the chunks off exactly once so that iterating an exhausted
+            # stream again doesn't write a second usage row.
             if self._usage_callback and self._chunks:
-                self._usage_callback(self._chunks)
+                chunks, self._chunks = self._chunks, []
+                self._usage_callback(chunks)
             raise
 
         # Intercept each chunk
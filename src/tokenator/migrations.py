@@ -1,11 +1,16 @@
 """Database migration utilities for tokenator."""
 
 import os
+from functools import lru_cache
 from pathlib import Path
 from alembic.config import Config
 from alembic import command
+from alembic.script import ScriptDirectory
 from .utils import get_default_db_path
 
+# Databases already upgraded to head by this process
+_MIGRATED_DB_PATHS = set()
+
 
 def get_alembic_config(db_path: str = None) -> Config:
     """Get Alembic config for migrations."""
@@ -23,11 +28,26 @@ def get_alembic_config(db_path: str = None) -> Config:
     return config
 
 
+@lru_cache(maxsize=None)
+def _head_revision() -> str:
+    """Head revision of the bundled migration scripts, read from disk once."""
+    # Only the script location is needed; a db_path would pull in the default
+    # path lookup, which creates directories as a side effect
+    migrations_dir = Path(__file__).parent / "migrations"
+    return ScriptDirectory(str(migrations_dir)).get_current_head()
+
+
 def check_and_run_migrations(db_path: str = None):
     """Check and run any pending database migrations."""
     if db_path is None:
         db_path = get_default_db_path()
 
+    # Every wrapper init lands here; skip Alembic's schema introspection for a
+    # database this process has already upgraded, unless the file was removed.
+    resolved_path = os.path.abspath(db_path)
+    if resolved_path in _MIGRATED_DB_PATHS and os.path.exists(resolved_path):
+        return
+
     dirname = os.path.dirname(db_path)
     if dirname:
         os.makedirs(dirname, exist_ok=True)
@@ -36,7 +56,15 @@ def check_and_run_migrations(db_path: str = None):
     import sqlite3
 
     conn = sqlite3.connect(db_path)
-    conn.close()
+    try:
+        current = conn.execute("SELECT version_num FROM alembic_version").fetchone()
+    except sqlite3.OperationalError:
+        current = None  # Fresh database without an alembic_version table
+    finally:
+        conn.close()
 
-    config = get_alembic_config(db_path)
-    command.upgrade(config, "head")
+    # A database already at head (e.g. from an earlier process) skips Alembic
+    if current is None or current[0] != _head_revision():
+        config = get_alembic_config(db_path)
+        command.upgrade(config, "head")
+    _MIGRATED_DB_PATHS.add(resolved_path)
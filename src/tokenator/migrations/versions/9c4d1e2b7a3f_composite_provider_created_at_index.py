@@ -0,0 +1,34 @@
+"""Composite provider/created_at index
+
+Revision ID: 9c4d1e2b7a3f
+Revises: f028b8155fed
+Create Date: 2026-10-16 10:12:41.508213
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9c4d1e2b7a3f"
+down_revision: Union[str, None] = "f028b8155fed"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_index("idx_provider", table_name="token_usage")
+    op.create_index(
+        "idx_provider_created_at",
+        "token_usage",
+        [sa.text("lower(provider)"), "created_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_provider_created_at", table_name="token_usage")
+    op.create_index("idx_provider", "token_usage", ["provider"], unique=False)
@@ -1,8 +1,11 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Optional
 
 
 class TokenRate(BaseModel):
+    # Rates are shared between models in MODEL_COSTS, so keep them immutable
+    model_config = ConfigDict(frozen=True)
+
     prompt: float = Field(..., description="Cost per prompt token")
     completion: float = Field(..., description="Cost per completion token")
     prompt_audio: Optional[float] = Field(
@@ -52,8 +52,11 @@ class OpenAIAsyncStreamInterceptor(AsyncStream[_T]):
             chunk = await self._base_stream.__anext__()
         except StopAsyncIteration:
             # Once the base stream is fully consumed, we can do final usage/logging.
+            # Hand the chunks off exactly once so that iterating an exhausted
+            # stream again doesn't write a second usage row.
             if self._usage_callback and self._chunks:
-                self._usage_callback(self._chunks)
+                chunks, self._chunks = self._chunks, []
+                self._usage_callback(chunks)
             raise
 
         # Intercept each chunk
@@ -121,8 +124,11 @@ class OpenAISyncStreamInterceptor(Stream[_T]):
             chunk = self._base_stream.__next__()
         except StopIteration:
             # Once the base stream is fully consumed, we can do final usage/logging.
+            # Hand the chunks off exactly once so that iterating an exhausted
+            # stream again doesn't write a second usage row.
             if self._usage_callback and self._chunks:
-                self._usage_callback(self._chunks)
+                chunks, self._chunks = self._chunks, []
+                self._usage_callback(chunks)
             raise
 
         # Intercept each chunk
@@ -1,9 +1,19 @@
 """SQLAlchemy models for tokenator."""
 
+import os
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Index
+from sqlalchemy import (
+    create_engine,
+    event,
+    func,
+    Column,
+    Integer,
+    String,
+    DateTime,
+    Index,
+)
 from sqlalchemy.orm import sessionmaker, scoped_session, declarative_base
 
 from .utils import get_default_db_path
@@ -12,19 +22,59 @@ from . import state  # Import state to access db_path
 Base = declarative_base()
 
 
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Use WAL journaling so commits avoid a full fsync and readers don't block writers."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    # 64 MiB page cache and 256 MiB memory map keep report scans off the read path
+    cursor.execute("PRAGMA cache_size=-65536")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.close()
+
+
 def get_engine(db_path: Optional[str] = None):
     """Create SQLAlchemy engine with the given database path."""
     if db_path is None:
         db_path = state.db_path or get_default_db_path()  # Use state.db_path if set
-    return create_engine(f"sqlite:///{db_path}", echo=False)
+    # SQLAlchemy 2 already pools file databases with QueuePool and
+    # check_same_thread=False; LIFO hands out the connection with the warmest
+    # page cache instead of rotating through idle ones
+    engine = create_engine(f"sqlite:///{db_path}", echo=False, pool_use_lifo=True)
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+    return engine
+
+
+# One engine and session factory per database path, shared by every wrapper
+_SESSION_FACTORIES = {}
 
 
 def get_session():
     """Create a thread-safe session factory."""
-    engine = get_engine()
-    # Base.metadata.create_all(engine)
-    session_factory = sessionmaker(bind=engine)
-    return scoped_session(session_factory)
+    db_path = state.db_path or get_default_db_path()
+    # Key on the absolute path so relative and absolute spellings of one file
+    # share an engine, matching how migrations track applied databases
+    key = os.path.abspath(db_path)
+    Session = _SESSION_FACTORIES.get(key)
+    if Session is not None and not os.path.exists(key):
+        # The file was removed; pooled connections still point at the unlinked
+        # inode, so drop them and open the recreated file instead
+        Session.remove()
+        Session.bind.dispose()
+        del _SESSION_FACTORIES[key]
+        Session = None
+    if Session is None:
+        engine = get_engine(db_path)
+        Session = scoped_session(sessionmaker(bind=engine))
+        _SESSION_FACTORIES[key] = Session
+    return Session
+
+
+def active_session_factories():
+    """Return the session factories get_session currently hands out."""
+    return list(_SESSION_FACTORIES.values())
 
 
 class TokenUsage(Base):
@@ -62,6 +112,7 @@ class TokenUsage(Base):
     __table_args__ = (
         Index("idx_created_at", "created_at"),
         Index("idx_execution_id", "execution_id"),
-        Index("idx_provider", "provider"),
+        # Reports filter on a case-insensitive provider plus a created_at range
+        Index("idx_provider_created_at", func.lower(provider), created_at),
         Index("idx_model", "model"),
     )
@@ -10,3 +10,13 @@ is_tokenator_enabled = True
 
 # Store the database path
 db_path: Optional[str] = None
+
+# Usage rows are buffered in memory and written in one batch once this many
+# are pending or usage_flush_secs have passed since the last write. The
+# default of 1 writes every call immediately.
+usage_flush_rows: int = 1
+usage_flush_secs: float = 5.0
+
+# Commit due usage batches on a background thread so API calls don't wait on
+# SQLite; usage queries still flush pending rows before reading.
+usage_background_writes: bool = False
@@ -1,8 +1,11 @@
 """Cost analysis functions for token usage."""
 
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from typing import Dict, Optional, Union
 
+from sqlalchemy import Row, case, func, select
+
+from .base_wrapper import flush_usage_buffers
 from .schemas import get_session, TokenUsage
 from .models import (
     CompletionTokenDetails,
@@ -20,6 +23,80 @@ import time
 
 logger = logging.getLogger(__name__)
 
+# Default GPT4O pricing, used for models missing from the pricing data. TokenRate
+# is frozen, so every fallback entry can share this one instance
+GPT4O_PRICING = TokenRate(
+    prompt=0.0000025,
+    completion=0.000010,
+    prompt_audio=0.0001,
+    completion_audio=0.0002,
+    prompt_cached_input=0.00000125,
+    prompt_cached_creation=0.00000125,
+)
+
+# Prompt tokens billed at the plain text rate: audio tokens take precedence over
+# cached input tokens, matching how a single row has always been priced
+_PROMPT_TEXT_TOKENS = case(
+    (
+        TokenUsage.prompt_audio_tokens != 0,
+        TokenUsage.prompt_tokens - TokenUsage.prompt_audio_tokens,
+    ),
+    (
+        TokenUsage.prompt_cached_input_tokens != 0,
+        TokenUsage.prompt_tokens - TokenUsage.prompt_cached_input_tokens,
+    ),
+    else_=TokenUsage.prompt_tokens,
+)
+
+_SUMMED_COLUMNS = (
+    TokenUsage.prompt_tokens,
+    TokenUsage.completion_tokens,
+    TokenUsage.total_tokens,
+    TokenUsage.prompt_cached_input_tokens,
+    TokenUsage.prompt_cached_creation_tokens,
+    TokenUsage.prompt_audio_tokens,
+    TokenUsage.completion_audio_tokens,
+    TokenUsage.completion_reasoning_tokens,
+    TokenUsage.completion_accepted_prediction_tokens,
+    TokenUsage.completion_rejected_prediction_tokens,
+)
+
+# One summed row per provider/model; cost is linear in these sums, so pricing
+# the grouped rows matches pricing every logged call individually
+USAGE_TOTALS = select(
+    TokenUsage.provider,
+    TokenUsage.model,
+    *(func.sum(column).label(column.key) for column in _SUMMED_COLUMNS),
+    func.sum(_PROMPT_TEXT_TOKENS).label("prompt_text_tokens"),
+).group_by(TokenUsage.provider, TokenUsage.model)
+
+
+def _parse_bound(
+    value: Union[datetime, str], arg_name: str, end_of_day: bool
+) -> datetime:
+    """Turn a between() bound into the naive local time usage rows are stored in."""
+    if isinstance(value, str):
+        try:
+            # Any date-only spelling fromisoformat accepts, including "20240101"
+            day = date.fromisoformat(value)
+        except ValueError:
+            value = datetime.fromisoformat(value)
+        else:
+            midnight = datetime.combine(day, datetime.min.time())
+            if end_of_day:
+                logger.warning(
+                    f"Date-only string provided for {arg_name}: {value}. Setting time to 23:59:59"
+                )
+                return midnight + timedelta(days=1) - timedelta(seconds=1)
+            logger.warning(
+                f"Date-only string provided for {arg_name}: {value}. Setting time to 00:00:00"
+            )
+            return midnight
+    if value.tzinfo is not None:
+        # created_at holds naive local timestamps, so compare in local time
+        value = value.astimezone().replace(tzinfo=None)
+    return value
+
 
 class TokenUsageService:
     def __init__(self):
@@ -65,7 +142,7 @@ class TokenUsageService:
             return {}
 
     def _calculate_cost(
-        self, usages: list[TokenUsage], provider: Optional[str] = None
+        self, usages: list[Row], provider: Optional[str] = None
     ) -> TokenUsageReport:
         try:
             if not state.is_tokenator_enabled:
@@ -76,17 +153,7 @@ class TokenUsageService:
                 logger.warning("No model costs available.")
                 return TokenUsageReport()
 
-            # Default GPT4O pricing updated with provided values
-            GPT4O_PRICING = TokenRate(
-                prompt=0.0000025,
-                completion=0.000010,
-                prompt_audio=0.0001,
-                completion_audio=0.0002,
-                prompt_cached_input=0.00000125,
-                prompt_cached_creation=0.00000125,
-            )
-
-            provider_model_usages: Dict[str, Dict[str, list[TokenUsage]]] = {}
+            provider_model_usages: Dict[str, Dict[str, list[Row]]] = {}
             logger.debug(f"usages: {len(usages)}")
 
             for usage in usages:
@@ -150,15 +217,7 @@ class TokenUsageService:
 
                     for usage in usages:
                         # Base token costs
-                        prompt_text_tokens = usage.prompt_tokens
-                        if usage.prompt_cached_input_tokens:
-                            prompt_text_tokens = (
-                                usage.prompt_tokens - usage.prompt_cached_input_tokens
-                            )
-                        if usage.prompt_audio_tokens:
-                            prompt_text_tokens = (
-                                usage.prompt_tokens - usage.prompt_audio_tokens
-                            )
+                        prompt_text_tokens = usage.prompt_text_tokens
 
                         completion_text_tokens = usage.completion_tokens
                         if usage.completion_audio_tokens:
@@ -375,18 +434,22 @@ class TokenUsageService:
                 logger.warning("Tokenator is disabled. Skipping usage query.")
                 return TokenUsageReport()
 
+            flush_usage_buffers()
             session = get_session()()
             try:
-                query = session.query(TokenUsage).filter(
+                query = USAGE_TOTALS.where(
                     TokenUsage.created_at.between(start_date, end_date)
                 )
 
                 if provider:
-                    query = query.filter(TokenUsage.provider.ilike(provider))
+                    # Matches idx_provider_created_at, which ilike's LIKE cannot use
+                    query = query.where(
+                        func.lower(TokenUsage.provider) == provider.lower()
+                    )
                 if model:
-                    query = query.filter(TokenUsage.model == model)
+                    query = query.where(TokenUsage.model == model)
 
-                usages = query.all()
+                usages = session.execute(query).all()
 
                 return self._calculate_cost(usages, provider or "all")
             except Exception as e:
@@ -476,31 +539,8 @@ class TokenUsageService:
                 f"Getting cost analysis between {start_date} and {end_date} (provider={provider}, model={model})"
             )
 
-            if isinstance(start_date, str):
-                try:
-                    start = datetime.strptime(start_date, "%Y-%m-%d %H:%M:%S")
-                except ValueError:
-                    logger.warning(
-                        f"Date-only string provided for start_date: {start_date}. Setting time to 00:00:00"
-                    )
-                    start = datetime.strptime(start_date, "%Y-%m-%d")
-            else:
-                start = start_date
-
-            if isinstance(end_date, str):
-                try:
-                    end = datetime.strptime(end_date, "%Y-%m-%d %H:%M:%S")
-                except ValueError:
-                    logger.warning(
-                        f"Date-only string provided for end_date: {end_date}. Setting time to 23:59:59"
-                    )
-                    end = (
-                        datetime.strptime(end_date, "%Y-%m-%d")
-                        + timedelta(days=1)
-                        - timedelta(seconds=1)
-                    )
-            else:
-                end = end_date
+            start = _parse_bound(start_date, "start_date", end_of_day=False)
+            end = _parse_bound(end_date, "end_date", end_of_day=True)
 
             return self._query_usage(start, end, provider, model)
         except Exception as e:
@@ -512,12 +552,11 @@ class TokenUsageService:
             if not state.is_tokenator_enabled:
                 return TokenUsageReport()
             logger.debug(f"Getting cost analysis for execution_id={execution_id}")
+            flush_usage_buffers()
             session = get_session()()
             try:
-                query = session.query(TokenUsage).filter(
-                    TokenUsage.execution_id == execution_id
-                )
-                return self._calculate_cost(query.all())
+                query = USAGE_TOTALS.where(TokenUsage.execution_id == execution_id)
+                return self._calculate_cost(session.execute(query).all())
             except Exception as e:
                 logger.warning(f"Error querying for_execution: {e}")
                 return TokenUsageReport()
@@ -532,6 +571,7 @@ class TokenUsageService:
             if not state.is_tokenator_enabled:
                 return TokenUsageReport()
             logger.debug("Getting cost analysis for last execution")
+            flush_usage_buffers()
             session = get_session()()
             try:
                 query = (
@@ -559,10 +599,10 @@ class TokenUsageService:
             logger.warning(
                 "Getting cost analysis for all time. This may take a while..."
             )
+            flush_usage_buffers()
             session = get_session()()
             try:
-                query = session.query(TokenUsage)
-                return self._calculate_cost(query.all())
+                return self._calculate_cost(session.execute(USAGE_TOTALS).all())
             except Exception as e:
                 logger.warning(f"Error querying all_time usage: {e}")
                 return TokenUsageReport()
@@ -579,6 +619,7 @@ class TokenUsageService:
         for i in range(5, 0, -1):
             logger.warning(str(i))
             time.sleep(1)
+        flush_usage_buffers()
         session = get_session()()
         try:
             session.query(TokenUsage).delete()
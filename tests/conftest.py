@@ -0,0 +1,71 @@
+import sys
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from tokenator.schemas import Base
+
+usage_module = sys.modules["tokenator.usage"]
+
+
+def _disable_pysqlite_transactions(dbapi_connection, connection_record):
+    # Let SQLAlchemy emit BEGIN itself so SAVEPOINTs work with pysqlite
+    dbapi_connection.isolation_level = None
+
+
+def _emit_begin(connection):
+    connection.exec_driver_sql("BEGIN")
+
+
+@pytest.fixture(scope="session")
+def memory_engine():
+    """One in-memory SQLite engine with the schema created once per session."""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    event.listen(engine, "connect", _disable_pysqlite_transactions)
+    event.listen(engine, "begin", _emit_begin)
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def skip_migrations(monkeypatch):
+    """Skip Alembic on wrapper init; tests/integration/test_db.py covers migrations."""
+    monkeypatch.setattr(
+        "tokenator.base_wrapper.check_and_run_migrations", lambda db_path=None: None
+    )
+
+
+@pytest.fixture
+def shared_db(memory_engine, skip_migrations, monkeypatch):
+    """Run each test inside an outer transaction that is rolled back afterwards.
+
+    Yields the session factory that both the wrappers and the usage service use.
+    """
+    connection = memory_engine.connect()
+    transaction = connection.begin()
+    # Wrapper commits only release a SAVEPOINT inside the outer transaction, and
+    # rows stay loaded after commit so assertions don't re-SELECT them
+    Session = scoped_session(
+        sessionmaker(
+            bind=connection,
+            join_transaction_mode="create_savepoint",
+            expire_on_commit=False,
+        )
+    )
+
+    monkeypatch.setattr("tokenator.base_wrapper.get_session", lambda: Session)
+    # tokenator/__init__ rebinds tokenator.usage to the service instance, so a
+    # dotted string path would resolve to it rather than the module
+    monkeypatch.setattr(usage_module, "get_session", lambda: Session)
+    yield Session
+
+    Session.remove()
+    transaction.rollback()
+    connection.close()
@@ -1,9 +1,13 @@
 import pytest
 import os
+import shutil
 import sys
 import sqlite3
+from unittest.mock import Mock
+from openai import OpenAI
 from tokenator.migrations import check_and_run_migrations, get_alembic_config
-from tokenator import usage
+from tokenator.models import TokenMetrics, TokenUsageStats
+from tokenator import state, tokenator_openai, usage
 from alembic.script import ScriptDirectory
 
 
@@ -26,8 +30,10 @@ def mock_colab(monkeypatch):
 
 
 @pytest.fixture
-def colab_db_path():
+def colab_db_path(tmp_path, monkeypatch):
     """Fixture for Colab database path."""
+    # Colab's default path is relative to the cwd, so run from a per-test dir
+    monkeypatch.chdir(tmp_path)
     return "usage.db"
 
 
@@ -95,6 +101,53 @@ def test_migrations_idempotent(temp_db, monkeypatch):
     verify_migrations(temp_db)
 
 
+def test_migrations_skipped_once_applied(temp_db, monkeypatch):
+    """Test that a database already upgraded by this process isn't re-migrated."""
+    check_and_run_migrations(temp_db)
+
+    upgrade = Mock()
+    monkeypatch.setattr("tokenator.migrations.command.upgrade", upgrade)
+    check_and_run_migrations(temp_db)
+    upgrade.assert_not_called()
+
+    # A removed database file is recreated and migrated again
+    os.remove(temp_db)
+    check_and_run_migrations(temp_db)
+    upgrade.assert_called_once()
+
+
+def test_migrations_skipped_for_database_at_head(temp_db, monkeypatch):
+    """Test that a database migrated by an earlier process isn't re-migrated."""
+    check_and_run_migrations(temp_db)
+
+    # Forget this process's upgrade, as if the database came from another run
+    monkeypatch.setattr("tokenator.migrations._MIGRATED_DB_PATHS", set())
+    upgrade = Mock()
+    monkeypatch.setattr("tokenator.migrations.command.upgrade", upgrade)
+    check_and_run_migrations(temp_db)
+    upgrade.assert_not_called()
+
+
+def test_recreated_database_receives_new_usage(tmp_path, monkeypatch):
+    """Test that logging after the database is deleted writes to the new file."""
+    monkeypatch.setattr(state, "db_path", None)
+    db_dir = tmp_path / "db"
+    db_path = str(db_dir / "usage.db")
+    stats = TokenUsageStats(
+        model="gpt-4o",
+        usage=TokenMetrics(prompt_tokens=10, completion_tokens=20, total_tokens=30),
+    )
+
+    tokenator_openai(Mock(spec=OpenAI), db_path=db_path)._log_usage(stats)
+    shutil.rmtree(db_dir)
+    tokenator_openai(Mock(spec=OpenAI), db_path=db_path)._log_usage(stats)
+    assert db_dir.is_dir()
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM token_usage").fetchone()[0] == 1
+    conn.close()
+
+
 def test_migrations_idempotent_colab(mock_colab, colab_db_path, monkeypatch):
     """Test migrations idempotency in Colab environment."""
     monkeypatch.setattr("tokenator.utils.get_default_db_path", lambda: colab_db_path)
@@ -1,15 +1,12 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+import sys
 import pytest
 from unittest.mock import patch
-import tempfile
-import os
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
+from sqlalchemy import insert
 
 from tokenator import usage
 from tokenator.models import TokenUsageReport, TokenRate
-from tokenator.schemas import TokenUsage, Base
-from tokenator import state
+from tokenator.schemas import TokenUsage
 
 MOCK_MODEL_COSTS = {
     "gpt-4": TokenRate(prompt=0.03, completion=0.06),
@@ -19,134 +16,97 @@ MOCK_MODEL_COSTS = {
 }
 
 
-@pytest.fixture
+# (age, execution_id, provider, model, prompt_tokens, completion_tokens)
+USAGE_ROWS = [
+    (timedelta(minutes=20), "exec-recent-1", "openai", "gpt-4", 100, 50),
+    (
+        timedelta(minutes=45),
+        "exec-recent-2",
+        "anthropic",
+        "claude-3-5-haiku",
+        200,
+        100,
+    ),
+    # Data from a few hours ago
+    (timedelta(hours=4), "exec-today-1", "openai", "gpt-4", 150, 75),
+    # Yesterday's data
+    (
+        timedelta(days=2, hours=2),
+        "exec-yesterday-1",
+        "anthropic",
+        "claude-3-5-haiku",
+        300,
+        150,
+    ),
+    # This week's data
+    (timedelta(days=6), "exec-lastweek-1", "openai", "gpt-4", 400, 200),
+    # Last week's data
+    (timedelta(days=13), "exec-lastweek-2", "openai", "gpt-4", 400, 200),
+    # Last month's data
+    (
+        timedelta(days=25),
+        "exec-lastmonth-1",
+        "anthropic",
+        "claude-3-5-sonnet",
+        500,
+        250,
+    ),
+    # Old data - outside month window
+    (timedelta(days=45), "exec-old-1", "openai", "gpt-4", 1000, 500),
+]
+
+
+@pytest.fixture(scope="module")
 def base_time():
     return datetime.now().replace(microsecond=0)
 
 
 @pytest.fixture
-def temp_db():
-    """Create a temporary test database"""
-    with tempfile.TemporaryDirectory() as tmpdir:
-        db_path = os.path.join(tmpdir, "test_tokens.db")
-        db_url = f"sqlite:///{db_path}"
-
-        engine = create_engine(db_url)
-        Base.metadata.create_all(engine)
-
-        Session = sessionmaker(bind=engine)
-        state.db_path = db_path
-        with patch("tokenator.schemas.get_session", return_value=Session):
-            yield Session
-
-        Base.metadata.drop_all(engine)
+def temp_db(shared_db):
+    """Use the session-wide in-memory database, rolled back after each test"""
+    return shared_db
+
+
+@pytest.fixture(scope="module")
+def usage_rows(base_time):
+    """Build the token usage rows once per module; tests never mutate them"""
+    return [
+        dict(
+            execution_id=execution_id,
+            provider=provider,
+            model=model,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens,
+            total_cost=0,
+            created_at=base_time - age,
+        )
+        for (
+            age,
+            execution_id,
+            provider,
+            model,
+            prompt_tokens,
+            completion_tokens,
+        ) in USAGE_ROWS
+    ]
 
 
 @pytest.fixture
-def usage_data(temp_db, base_time):
-    """Create actual token usage records in the test database"""
+def usage_data(temp_db, usage_rows):
+    """Insert token usage rows into the test database in a single executemany"""
     session = temp_db()
-    records = [
-        TokenUsage(
-            execution_id="exec-recent-1",
-            provider="openai",
-            model="gpt-4",
-            prompt_tokens=100,
-            completion_tokens=50,
-            total_tokens=150,
-            total_cost=0,
-            created_at=base_time - timedelta(minutes=20),
-        ),
-        TokenUsage(
-            execution_id="exec-recent-2",
-            provider="anthropic",
-            model="claude-3-5-haiku",
-            prompt_tokens=200,
-            completion_tokens=100,
-            total_tokens=300,
-            total_cost=0,
-            created_at=base_time - timedelta(minutes=45),
-        ),
-        # Data from a few hours ago
-        TokenUsage(
-            execution_id="exec-today-1",
-            provider="openai",
-            model="gpt-4",
-            prompt_tokens=150,
-            completion_tokens=75,
-            total_tokens=225,
-            total_cost=0,
-            created_at=base_time - timedelta(hours=4),
-        ),
-        # Yesterday's data
-        TokenUsage(
-            execution_id="exec-yesterday-1",
-            provider="anthropic",
-            model="claude-3-5-haiku",
-            prompt_tokens=300,
-            completion_tokens=150,
-            total_tokens=450,
-            total_cost=0,
-            created_at=base_time - timedelta(days=2, hours=2),
-        ),
-        # This week's data
-        TokenUsage(
-            execution_id="exec-lastweek-1",
-            provider="openai",
-            model="gpt-4",
-            prompt_tokens=400,
-            completion_tokens=200,
-            total_tokens=600,
-            total_cost=0,
-            created_at=base_time - timedelta(days=6),
-        ),
-        # Last week's data
-        TokenUsage(
-            execution_id="exec-lastweek-2",
-            provider="openai",
-            model="gpt-4",
-            prompt_tokens=400,
-            completion_tokens=200,
-            total_tokens=600,
-            total_cost=0,
-            created_at=base_time - timedelta(days=13),
-        ),
-        # Last month's data
-        TokenUsage(
-            execution_id="exec-lastmonth-1",
-            provider="anthropic",
-            model="claude-3-5-sonnet",
-            prompt_tokens=500,
-            completion_tokens=250,
-            total_tokens=750,
-            total_cost=0,
-            created_at=base_time - timedelta(days=25),
-        ),
-        # Old data - outside month window
-        TokenUsage(
-            execution_id="exec-old-1",
-            provider="openai",
-            model="gpt-4",
-            prompt_tokens=1000,
-            completion_tokens=500,
-            total_tokens=1500,
-            total_cost=0,
-            created_at=base_time - timedelta(days=45),
-        ),
-    ]
-
-    session.add_all(records)
+    session.execute(insert(TokenUsage), usage_rows)
     session.commit()
-    return records
+    return usage_rows
 
 
 @pytest.fixture
 def token_usage_service():
     # Patch just the _get_model_costs method so it returns our test costs
-    with patch.object(
-        usage.TokenUsageService, "_get_model_costs", return_value=MOCK_MODEL_COSTS
-    ):
-        yield usage.TokenUsageService()
+    # tokenator.usage is the service instance, so patch its class
+    with patch.object(type(usage), "_get_model_costs", return_value=MOCK_MODEL_COSTS):
+        yield type(usage)()
 
 
 def test_last_hour(usage_data, base_time):
@@ -189,34 +149,54 @@ def test_last_month(usage_data, base_time):
     assert len(result.providers) == 2
 
 
-def test_between_date_filtering(usage_data, base_time):
-    # Test cases with different date/time formats
-    test_cases = [
+def _format_bound(value, fmt):
+    """Render a datetime bound with fmt, or pass it through unchanged if fmt is None"""
+    return value.strftime(fmt) if fmt else value
+
+
+@pytest.mark.parametrize(
+    "start_fmt,end_fmt,expected_tokens",
+    [
         # String dates with times
-        {
-            "start": (base_time - timedelta(days=7)).strftime("%Y-%m-%d %H:%M:%S"),
-            "end": (base_time - timedelta(days=1)).strftime("%Y-%m-%d %H:%M:%S"),
-            "expected_tokens": 1050,
-        },
+        pytest.param("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M:%S", 1050, id="strings"),
         # datetime objects
-        {
-            "start": base_time - timedelta(days=7),
-            "end": base_time - timedelta(days=1),
-            "expected_tokens": 1050,
-        },
+        pytest.param(None, None, 1050, id="datetimes"),
         # Mixed formats
-        {
-            "start": (base_time - timedelta(days=7)).strftime("%Y-%m-%d"),
-            "end": base_time - timedelta(days=1),
-            "expected_tokens": 1050,
-        },
-    ]
+        pytest.param("%Y-%m-%d", None, 1050, id="mixed"),
+    ],
+)
+def test_between_date_filtering(
+    usage_data, base_time, start_fmt, end_fmt, expected_tokens
+):
+    start = _format_bound(base_time - timedelta(days=7), start_fmt)
+    end = _format_bound(base_time - timedelta(days=1), end_fmt)
+
+    result = usage.between(start, end)
+    assert (
+        result.total_tokens == expected_tokens
+    ), f"Failed for format: start={start} end={end} | expected {expected_tokens}, got {result.total_tokens}"
+
+
+@pytest.mark.skipif(
+    sys.version_info < (3, 11),
+    reason="fromisoformat accepts compact dates from Python 3.11",
+)
+def test_between_compact_end_date_covers_whole_day(usage_data, base_time):
+    # End on the day of the two-day-old row, which is after that day's midnight
+    start = (base_time - timedelta(days=7)).strftime("%Y%m%d")
+    end = (base_time - timedelta(days=2, hours=2)).strftime("%Y%m%d")
+
+    assert usage.between(start, end).total_tokens == 1050
 
-    for case in test_cases:
-        result = usage.between(case["start"], case["end"])
-        assert (
-            result.total_tokens == case["expected_tokens"]
-        ), f"Failed for format: start={case['start']} end={case['end']} | expected {case['expected_tokens']}, got {result.total_tokens}"
+
+def test_between_converts_offsets_to_local_time(usage_data, base_time):
+    # End a minute before the two-day-old row, spelled in a fixed +05:00 offset;
+    # read as local wall-clock time the bound would land after that row
+    offset = timezone(timedelta(hours=5))
+    start = (base_time - timedelta(days=7)).astimezone(offset).isoformat()
+    end = (base_time - timedelta(days=2, hours=2, minutes=1)).astimezone(offset)
+
+    assert usage.between(start, end.isoformat()).total_tokens == 600
 
 
 def test_between_edge_cases(usage_data, base_time):
@@ -234,18 +214,25 @@ def test_between_edge_cases(usage_data, base_time):
     assert len(result.providers) == 0
 
 
-def test_between_provider_filtering(usage_data, base_time):
-    start_date = (base_time - timedelta(days=7)).strftime("%Y-%m-%d")
-    end_date = (base_time - timedelta(days=1)).strftime("%Y-%m-%d")
+@pytest.fixture(scope="module")
+def date_window(base_time):
+    """Date-only bounds from a week ago to yesterday, formatted once per module"""
+    return (
+        (base_time - timedelta(days=7)).strftime("%Y-%m-%d"),
+        (base_time - timedelta(days=1)).strftime("%Y-%m-%d"),
+    )
+
+
+def test_between_provider_filtering(usage_data, date_window):
+    start_date, end_date = date_window
 
     result = usage.between(start_date, end_date, provider="openai")
     assert len(result.providers) == 1
     assert result.providers[0].provider == "openai"
 
 
-def test_between_model_filtering(usage_data, base_time):
-    start_date = (base_time - timedelta(days=7)).strftime("%Y-%m-%d")
-    end_date = (base_time - timedelta(days=1)).strftime("%Y-%m-%d")
+def test_between_model_filtering(usage_data, date_window):
+    start_date, end_date = date_window
 
     result = usage.between(start_date, end_date, model="gpt-4")
     assert len(result.providers) == 1
@@ -283,3 +270,40 @@ def test_last_execution(usage_data):
 
     assert result.total_tokens == 150  # exec-recent-1 is the most recent
     assert result.providers[0].provider == "openai"
+
+
+def test_mixed_detail_rows_priced_per_call(temp_db, token_usage_service):
+    # Cached and audio prompt tokens are billed off the text rate row by row,
+    # so the grouped totals must price each row's own split
+    rows = [
+        dict(prompt_cached_input_tokens=40),
+        dict(prompt_audio_tokens=30),
+        dict(),
+    ]
+    session = temp_db()
+    session.execute(
+        insert(TokenUsage),
+        [
+            dict(
+                execution_id="exec-mixed",
+                provider="openai",
+                model="gpt-4o",
+                prompt_tokens=100,
+                completion_tokens=50,
+                total_tokens=150,
+                total_cost=0,
+                **details,
+            )
+            for details in rows
+        ],
+    )
+    session.commit()
+
+    result = token_usage_service.for_execution("exec-mixed")
+
+    # (60 + 70 + 100) prompt text tokens * 0.001 + 150 completion tokens * 0.002
+    assert result.total_cost == pytest.approx(0.53)
+    assert result.total_tokens == 450
+    details = result.providers[0].models[0].prompt_tokens_details
+    assert details.cached_input_tokens == 40
+    assert details.audio_tokens == 30
@@ -1,9 +1,7 @@
-from unittest.mock import patch
+import sys
 import pytest
 from datetime import datetime, timedelta
-import tempfile
-import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, func, select
 from sqlalchemy.orm import sessionmaker
 import threading
 from concurrent.futures import ThreadPoolExecutor
@@ -13,21 +11,23 @@ from tokenator import usage, state
 
 
 @pytest.fixture
-def temp_db():
+def temp_db(tmp_path_factory, monkeypatch):
     """Create a temporary test database"""
-    with tempfile.TemporaryDirectory() as tmpdir:
-        db_path = os.path.join(tmpdir, "test_tokens.db")
-        db_url = f"sqlite:///{db_path}"
+    # pytest prunes its numbered tmp dirs itself, so no per-test rmtree
+    db_path = str(tmp_path_factory.mktemp("db", numbered=True) / "test_tokens.db")
+    db_url = f"sqlite:///{db_path}"
 
-        engine = create_engine(db_url)
-        Base.metadata.create_all(engine)
+    engine = create_engine(db_url)
+    Base.metadata.create_all(engine)
 
-        Session = sessionmaker(bind=engine)
-        state.db_path = db_path
-        with patch("tokenator.schemas.get_session", return_value=Session):
-            yield Session
+    Session = sessionmaker(bind=engine)
+    monkeypatch.setattr(state, "db_path", db_path)
+    # tokenator.usage is rebound to the service instance, so patch the module
+    monkeypatch.setattr(sys.modules["tokenator.usage"], "get_session", lambda: Session)
+    yield Session
 
-        Base.metadata.drop_all(engine)
+    Base.metadata.drop_all(engine)
+    engine.dispose()
 
 
 @pytest.fixture
@@ -100,7 +100,9 @@ def test_concurrent_writes(temp_db):
     # Verify all records were written
     session = temp_db()
     try:
-        record_count = session.query(TokenUsage).count()
+        record_count = session.execute(
+            select(func.count()).select_from(TokenUsage)
+        ).scalar()
         assert record_count == 40  # 4 threads * 10 records each
     finally:
         session.close()
@@ -178,7 +180,11 @@ def test_transaction_rollback(db_session):
         db_session.rollback()
 
     # Verify record wasn't saved
-    count = db_session.query(TokenUsage).filter_by(execution_id="rollback-test").count()
+    count = db_session.execute(
+        select(func.count())
+        .select_from(TokenUsage)
+        .where(TokenUsage.execution_id == "rollback-test")
+    ).scalar()
     assert count == 0
 
 
@@ -245,11 +251,11 @@ def test_data_persistence(temp_db):
     # Verify in new session
     session2 = temp_db()
     try:
-        record = (
-            session2.query(TokenUsage)
-            .filter_by(execution_id="persistence-test")
-            .first()
-        )
+        record = session2.execute(
+            select(TokenUsage.total_tokens).where(
+                TokenUsage.execution_id == "persistence-test"
+            )
+        ).first()
         assert record is not None
         assert record.total_tokens == 150
     finally:
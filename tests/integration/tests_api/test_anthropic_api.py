@@ -85,7 +85,6 @@ class TestAnthropicAPI:
         assert usage_last.providers[0].completion_tokens > 1
         assert usage_last.providers[0].total_tokens > 1
 
-    @pytest.mark.asyncio
     async def test_async_completion(self, async_client):
         response = await async_client.messages.create(
             model="claude-3-5-haiku-20241022",
@@ -115,7 +114,6 @@ class TestAnthropicAPI:
             == response.usage.input_tokens + response.usage.output_tokens
         )
 
-    @pytest.mark.asyncio
     async def test_async_stream(self, async_client):
         chunks = []
         stream = await async_client.messages.create(
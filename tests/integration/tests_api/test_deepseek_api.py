@@ -107,7 +107,6 @@ class TestDeepSeekAPI:
         assert usage_last.providers[0].completion_tokens > 1
         assert usage_last.providers[0].total_tokens > 1
 
-    @pytest.mark.asyncio
     async def test_async_completion(self, async_client):
         response = await async_client.chat.completions.create(
             model="deepseek-chat",
@@ -136,7 +135,6 @@ class TestDeepSeekAPI:
         )
         assert usage_last.providers[0].total_tokens == response.usage.total_tokens
 
-    @pytest.mark.asyncio
     async def test_async_stream(self, async_client):
         usage_init: TokenUsageReport = usage.last_hour()
         assert usage_init.prompt_tokens == 0
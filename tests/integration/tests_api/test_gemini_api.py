@@ -96,7 +96,6 @@ class TestGeminiAPI:
         assert usage_last.providers[0].completion_tokens > 0
         assert usage_last.providers[0].total_tokens > 0
 
-    @pytest.mark.asyncio
     async def test_async_completion(self, sync_client):
         _ = await sync_client.aio.models.generate_content(
             model="gemini-2.0-flash",
@@ -122,7 +121,6 @@ class TestGeminiAPI:
         assert usage_last.providers[0].completion_tokens > 0
         assert usage_last.providers[0].total_tokens > 0
 
-    @pytest.mark.asyncio
     async def test_async_stream(self, sync_client):
         usage_init: TokenUsageReport = usage.last_hour()
         assert usage_init.prompt_tokens == 0
@@ -101,7 +101,6 @@ class TestLangsmithAPI:
         assert usage_last.providers[0].total_tokens > 1
 
     @traceable
-    @pytest.mark.asyncio
     async def test_async_completion(self, async_client):
         response = await async_client.chat.completions.create(
             model="gpt-4o-mini",
@@ -131,7 +130,6 @@ class TestLangsmithAPI:
         assert usage_last.providers[0].total_tokens == response.usage.total_tokens
 
     @traceable
-    @pytest.mark.asyncio
     async def test_async_stream(self, async_client):
         usage_init: TokenUsageReport = usage.last_hour()
         assert usage_init.prompt_tokens == 0
@@ -93,7 +93,6 @@ class TestOpenAIAPI:
         assert usage_last.providers[0].completion_tokens > 1
         assert usage_last.providers[0].total_tokens > 1
 
-    @pytest.mark.asyncio
     async def test_async_completion(self, async_client):
         response = await async_client.chat.completions.create(
             model="gpt-4o-mini",
@@ -122,7 +121,6 @@ class TestOpenAIAPI:
         )
         assert usage_last.providers[0].total_tokens == response.usage.total_tokens
 
-    @pytest.mark.asyncio
     async def test_async_stream(self, async_client):
         usage_init: TokenUsageReport = usage.last_hour()
         assert usage_init.prompt_tokens == 0
@@ -193,7 +191,6 @@ class TestOpenAIAPI:
         )
         assert usage_last.providers[0].total_tokens == response.usage.total_tokens
 
-    @pytest.mark.asyncio
     async def test_async_completion_with_structured_output(self, async_client):
         from pydantic import BaseModel
 
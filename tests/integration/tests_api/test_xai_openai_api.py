@@ -76,7 +76,6 @@ class TestOpenAIAPI:
         finally:
             session.close()
 
-    @pytest.mark.asyncio
     async def test_async_completion(self, async_client):
         response = await async_client.chat.completions.create(
             model="grok-2-latest",
@@ -96,7 +95,6 @@ class TestOpenAIAPI:
         finally:
             session.close()
 
-    @pytest.mark.asyncio
     async def test_async_stream(self, async_client):
         chunks = []
         stream = await async_client.chat.completions.create(
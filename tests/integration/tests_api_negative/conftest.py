@@ -0,0 +1,18 @@
+import pytest
+
+
+def _skip_failed_responses(response):
+    """Only record 2xx responses, so a transient error is never replayed."""
+    if 200 <= response["status"]["code"] < 300:
+        return response
+    return None
+
+
+@pytest.fixture(scope="module")
+def vcr_config():
+    """Record a cassette the first time a test runs with API keys set.
+
+    Cassettes are gitignored, so CI and fresh checkouts still call the live
+    APIs; only a local rerun replays the cassettes recorded by an earlier run.
+    """
+    return {"record_mode": "once", "before_record_response": _skip_failed_responses}
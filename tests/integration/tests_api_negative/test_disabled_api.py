@@ -0,0 +1,180 @@
+"""Test provider APIs with tokenator disabled."""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, NamedTuple
+
+import httpx
+import pytest
+import pytest_asyncio
+from anthropic import Anthropic, AsyncAnthropic
+from openai import OpenAI, AsyncOpenAI
+from tokenator import tokenator_anthropic, tokenator_openai, usage
+import tokenator.state as state
+
+
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+VCR_FILTER_HEADERS = ["authorization", "x-api-key"]
+# vcrpy's default matchers ignore the body, so concurrent plain and streaming
+# POSTs to one endpoint could replay each other's response
+VCR_MATCH_ON = ["method", "scheme", "host", "port", "path", "query", "body"]
+MESSAGES = [{"role": "user", "content": "Hello!"}]
+
+
+class ProviderCase(NamedTuple):
+    api_key_env: str
+    wrap: Callable[..., Any]
+    sync_client: Callable[..., Any]
+    async_client: Callable[..., Any]
+    create: Callable[[Any], Callable[..., Any]]
+    create_kwargs: dict
+    response_text: Callable[[Any], Any]
+    chunk_has_text: Callable[[Any], bool]
+
+
+PROVIDERS = {
+    "openai": ProviderCase(
+        api_key_env="OPENAI_API_KEY",
+        wrap=tokenator_openai,
+        sync_client=OpenAI,
+        async_client=AsyncOpenAI,
+        create=lambda wrapped: wrapped.chat.completions.create,
+        create_kwargs={"model": "gpt-4o-mini"},
+        response_text=lambda response: response.choices[0].message.content,
+        chunk_has_text=lambda chunk: bool(chunk.choices[0].delta.content),
+    ),
+    "anthropic": ProviderCase(
+        api_key_env="ANTHROPIC_API_KEY",
+        wrap=tokenator_anthropic,
+        sync_client=Anthropic,
+        async_client=AsyncAnthropic,
+        create=lambda wrapped: wrapped.messages.create,
+        create_kwargs={"model": "claude-3-5-haiku-20241022", "max_tokens": 20},
+        response_text=lambda response: response.content[0].text,
+        chunk_has_text=lambda chunk: chunk.type == "content_block_delta",
+    ),
+}
+
+
+@pytest.fixture(
+    scope="module",
+    params=[
+        pytest.param(
+            name,
+            marks=pytest.mark.skipif(
+                not os.getenv(case.api_key_env),
+                reason=f"{case.api_key_env} environment variable not set",
+            ),
+        )
+        for name, case in PROVIDERS.items()
+    ],
+)
+def provider(request):
+    return PROVIDERS[request.param]
+
+
+@pytest.fixture(scope="module")
+def sync_client(provider):
+    """Create a sync client sharing one pooled connection per provider."""
+    http_client = httpx.Client(limits=HTTP_LIMITS, timeout=60)
+    yield provider.sync_client(http_client=http_client)
+    http_client.close()
+
+
+@pytest_asyncio.fixture(scope="module")
+async def async_client(provider):
+    """Create an async client sharing one pooled connection per provider."""
+    http_client = httpx.AsyncClient(limits=HTTP_LIMITS, timeout=60)
+    yield provider.async_client(http_client=http_client)
+    await http_client.aclose()
+
+
+@pytest.fixture
+def disabled_db_path(tmp_path, monkeypatch):
+    """Provide a db path whose wrapper initialization fails and disables tokenator."""
+
+    def _fail_migrations(db_path=None):
+        raise RuntimeError("injected migration failure")
+
+    # Fail init explicitly rather than relying on filesystem permissions,
+    # which are ignored when run as root
+    monkeypatch.setattr(
+        "tokenator.base_wrapper.check_and_run_migrations", _fail_migrations
+    )
+    enabled = state.is_tokenator_enabled
+    yield str(tmp_path / "tokenator.db")
+    # The failed init leaves tokenator disabled; restore it for later tests
+    state.is_tokenator_enabled = enabled
+
+
+def assert_nothing_logged():
+    for recent_usage in (usage.last_hour(), usage.all_time()):
+        assert recent_usage.total_cost == 0
+        assert recent_usage.total_tokens == 0
+
+
+def _sync_plain_text(provider, create):
+    response = create(messages=MESSAGES, **provider.create_kwargs)
+    return provider.response_text(response)
+
+
+def _sync_stream_stats(provider, create):
+    response = create(messages=MESSAGES, stream=True, **provider.create_kwargs)
+
+    # Drain the stream in one pass without holding every chunk in memory
+    count = 0
+    found = False
+    for chunk in response:
+        count += 1
+        found = found or provider.chunk_has_text(chunk)
+    return count, found
+
+
+@pytest.mark.vcr(filter_headers=VCR_FILTER_HEADERS, match_on=VCR_MATCH_ON)
+def test_sync_disabled_logging(provider, sync_client, disabled_db_path):
+    """Test concurrent sync plain and streaming calls when tokenator is disabled."""
+    wrapped = provider.wrap(sync_client, db_path=disabled_db_path)
+    assert not state.is_tokenator_enabled
+
+    create = provider.create(wrapped)
+    # Both calls block on network I/O, so overlap them instead of paying two RTTs
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        plain = executor.submit(_sync_plain_text, provider, create)
+        streamed = executor.submit(_sync_stream_stats, provider, create)
+
+        assert plain.result()
+        count, found = streamed.result()
+
+    assert count > 0
+    assert found
+
+    assert_nothing_logged()
+
+
+@pytest.mark.vcr(filter_headers=VCR_FILTER_HEADERS)
+@pytest.mark.parametrize("stream", [False, True], ids=["plain", "stream"])
+async def test_async_disabled_logging(provider, async_client, disabled_db_path, stream):
+    """Test async API when tokenator is disabled."""
+    wrapped = provider.wrap(async_client, db_path=disabled_db_path)
+    assert not state.is_tokenator_enabled
+
+    create = provider.create(wrapped)
+    if not stream:
+        response = await create(messages=MESSAGES, **provider.create_kwargs)
+        assert provider.response_text(response)
+    else:
+        response = await create(
+            messages=MESSAGES, stream=True, **provider.create_kwargs
+        )
+
+        # Drain the stream in one pass without holding every chunk in memory
+        count = 0
+        found = False
+        async for chunk in response:
+            count += 1
+            found = found or provider.chunk_has_text(chunk)
+
+        assert count > 0
+        assert found
+
+    assert_nothing_logged()
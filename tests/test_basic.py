@@ -1,16 +1,30 @@
-import tempfile
-from src.tokenator.base_wrapper import BaseWrapper
-from src.tokenator.utils import get_default_db_path
+import pytest
+from sqlalchemy import text
+from tokenator import state
+from tokenator.base_wrapper import BaseWrapper
+from tokenator.utils import get_default_db_path
 
 
-def test_custom_db_path():
-    # Create a temporary file to act as the custom db_path
-    with tempfile.NamedTemporaryFile() as tmp:
-        custom_db_path = tmp.name
-        wrapper = BaseWrapper(client=None, db_path=custom_db_path)
-        session = wrapper.Session()
-        assert session.bind.url.database == custom_db_path
-        session.close()
+@pytest.fixture
+def custom_wrapper(tmp_path):
+    custom_db_path = str(tmp_path / "tokens.db")
+    db_path = state.db_path
+    wrapper = BaseWrapper(client=None, db_path=custom_db_path)
+    yield wrapper, custom_db_path
+    wrapper.Session.remove()
+    # BaseWrapper pointed state.db_path at this test's database
+    state.db_path = db_path
+
+
+def test_custom_db_path(custom_wrapper):
+    wrapper, custom_db_path = custom_wrapper
+    session = wrapper.Session()
+    assert session.bind.url.database == custom_db_path
+    assert session.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+    assert session.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+    assert session.execute(text("PRAGMA temp_store")).scalar() == 2  # MEMORY
+    assert session.execute(text("PRAGMA cache_size")).scalar() == -65536
+    session.close()
 
 
 def test_default_db_path():
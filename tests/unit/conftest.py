@@ -0,0 +1,8 @@
+import pytest
+
+MEMORY_DB_PATH = ":memory:"
+
+
+@pytest.fixture
+def temp_db(shared_db):
+    return MEMORY_DB_PATH
@@ -0,0 +1,94 @@
+"""Helpers shared by the OpenAI and Anthropic wrapper unit tests."""
+
+import inspect
+import re
+
+from sqlalchemy import func, select
+
+from tokenator.schemas import TokenUsage
+
+HELLO_MSGS = [{"role": "user", "content": "Hello"}]
+
+# Assertion queries are built once and reused by every test. FIRST_USAGE reads
+# only the asserted columns so rows skip ORM entity materialization
+FIRST_USAGE = select(
+    TokenUsage.provider,
+    TokenUsage.model,
+    TokenUsage.execution_id,
+    TokenUsage.prompt_tokens,
+    TokenUsage.completion_tokens,
+    TokenUsage.total_tokens,
+).limit(1)
+USAGE_COUNT = select(func.count()).select_from(TokenUsage)
+
+INVALID_CLIENT_MSG = re.compile("Client must be an instance")
+
+
+async def awaitable(value):
+    """Stand-in for an awaited SDK call that simply resolves to value."""
+    return value
+
+
+async def async_iter(chunks):
+    """Stand-in for an SDK async stream yielding the given chunks.
+
+    Exceptions in chunks are raised in place, like a connection dropping mid-stream.
+    """
+    for chunk in chunks:
+        if isinstance(chunk, BaseException):
+            raise chunk
+        yield chunk
+
+
+def first_usage(client):
+    """Read the first usage row through the wrapper's scoped session."""
+    return client.Session().execute(FIRST_USAGE).first()
+
+
+def usage_count(client):
+    """Count usage rows through the wrapper's scoped session."""
+    return client.Session().execute(USAGE_COUNT).scalar()
+
+
+def assert_usage_logged(client, provider, model):
+    """Assert the single logged row matches the mocked 10/20 token response."""
+    usage = first_usage(client)
+    assert usage.provider == provider
+    assert usage.model == model
+    assert usage.prompt_tokens == 10
+    assert usage.completion_tokens == 20
+    assert usage.total_tokens == 30
+    return usage
+
+
+class StubCreate:
+    """Stand-in for an SDK create call: raises side_effect or returns return_value.
+
+    Tests only set these two attributes, so a plain class avoids Mock's
+    per-instance setup cost.
+    """
+
+    def __init__(self):
+        self.return_value = None
+        self.side_effect = None
+
+    def __call__(self, *args, **kwargs):
+        if self.side_effect is not None:
+            raise self.side_effect
+        return self.return_value
+
+
+def mock_sdk_create(resource, monkeypatch):
+    """Swap the create call on an SDK resource (e.g. client.messages) for a stub."""
+    create = StubCreate()
+    monkeypatch.setattr(resource, "create", create)
+    return create
+
+
+async def create_with_mock(create, mock_create, response=None, **kwargs):
+    """Call a wrapped create with the SDK call mocked, awaiting async wrappers."""
+    is_async = inspect.iscoroutinefunction(create)
+    if response is not None:
+        mock_create.return_value = awaitable(response) if is_async else response
+    result = create(messages=HELLO_MSGS, **kwargs)
+    return await result if is_async else result
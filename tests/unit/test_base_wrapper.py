@@ -0,0 +1,146 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier
+from unittest.mock import Mock
+
+import pytest
+from sqlalchemy.exc import SQLAlchemyError
+
+from tokenator import base_wrapper, state
+from tokenator.base_wrapper import BaseWrapper, flush_usage_buffers, get_usage_buffer
+from tokenator.models import TokenMetrics, TokenUsageStats
+from tests.unit.helpers import usage_count
+
+USAGE_STATS = TokenUsageStats(
+    model="gpt-4o",
+    usage=TokenMetrics(prompt_tokens=10, completion_tokens=20, total_tokens=30),
+)
+
+
+class _Wrapper(BaseWrapper):
+    """Minimal provider wrapper; buffering lives entirely in BaseWrapper."""
+
+    provider = "test"
+
+
+@pytest.fixture
+def wrapper(temp_db):
+    return _Wrapper(client=None, db_path=temp_db)
+
+
+def test_usage_buffered_until_flush_rows(wrapper, monkeypatch):
+    monkeypatch.setattr(state, "usage_flush_rows", 3)
+    monkeypatch.setattr(state, "usage_flush_secs", float("inf"))
+
+    for _ in range(2):
+        wrapper._log_usage(USAGE_STATS)
+    assert usage_count(wrapper) == 0
+
+    # The third row fills the buffer and all three land in one commit
+    wrapper._log_usage(USAGE_STATS)
+    assert usage_count(wrapper) == 3
+
+
+def test_usage_written_in_background(wrapper, monkeypatch):
+    monkeypatch.setattr(state, "usage_background_writes", True)
+
+    wrapper._log_usage(USAGE_STATS)
+
+    # Flushing waits for any in-flight background commit before returning
+    flush_usage_buffers()
+    assert usage_count(wrapper) == 1
+
+
+def test_usage_flushed_when_idle(wrapper, monkeypatch):
+    monkeypatch.setattr(state, "usage_flush_rows", 3)
+    monkeypatch.setattr(state, "usage_flush_secs", 60.0)
+
+    wrapper._log_usage(USAGE_STATS)
+    assert usage_count(wrapper) == 0
+
+    # Fire the armed idle timer's callback instead of waiting for it
+    buffer = get_usage_buffer(wrapper.Session)
+    idle_timer = buffer._idle_timer
+    idle_timer.function()
+
+    assert usage_count(wrapper) == 1
+    # The flush cancelled the timer, so its thread exits without firing again
+    assert buffer._idle_timer is None
+    idle_timer.join(timeout=5)
+    assert not idle_timer.is_alive()
+
+
+def test_usage_flush_error_logged(wrapper, monkeypatch, caplog):
+    # Flushes on this thread reuse the scoped session, so its insert fails
+    monkeypatch.setattr(
+        wrapper.Session(),
+        "execute",
+        Mock(side_effect=SQLAlchemyError("disk I/O error")),
+    )
+
+    wrapper._log_usage(USAGE_STATS)
+
+    assert "Failed to log token usage: disk I/O error" in caplog.text
+
+
+def test_background_writer_survives_session_error(wrapper, monkeypatch, caplog):
+    monkeypatch.setattr(state, "usage_background_writes", True)
+    buffer = get_usage_buffer(wrapper.Session)
+    failing_session = Mock(side_effect=SQLAlchemyError("unable to open database"))
+
+    with monkeypatch.context() as m:
+        m.setattr(buffer, "Session", failing_session)
+        wrapper._log_usage(USAGE_STATS)
+        flush_usage_buffers()
+    assert "Failed to log token usage: unable to open database" in caplog.text
+
+    # The writer thread is still running, so later rows are committed
+    wrapper._log_usage(USAGE_STATS)
+    flush_usage_buffers()
+    assert buffer._writer.is_alive()
+    assert usage_count(wrapper) == 1
+
+
+def test_get_usage_buffer_concurrent_lookups(monkeypatch):
+    monkeypatch.setattr(base_wrapper, "_USAGE_BUFFERS", {})
+    shared_session = Mock()
+
+    def slow_active_session_factories():
+        # Widen the window between the lookup miss and the insert
+        time.sleep(0.001)
+        return [shared_session]
+
+    # Only the shared factory is live, so each new buffer retires the others
+    monkeypatch.setattr(
+        base_wrapper, "active_session_factories", slow_active_session_factories
+    )
+    sessions = [shared_session] * 8 + [Mock() for _ in range(24)]
+    barrier = Barrier(len(sessions))
+
+    def lookup(Session):
+        barrier.wait()
+        return Session, base_wrapper.get_usage_buffer(Session)
+
+    with ThreadPoolExecutor(max_workers=len(sessions)) as executor:
+        results = list(executor.map(lookup, sessions))
+
+    shared = {id(buffer) for Session, buffer in results if Session is shared_session}
+    # Racing lookups for one factory must all land on the same buffer
+    assert len(shared) == 1
+
+
+def test_retired_buffer_stops_its_writer(monkeypatch):
+    monkeypatch.setattr(state, "usage_background_writes", True)
+    retired_session = Mock()
+    buffer = base_wrapper._UsageBuffer(retired_session)
+    monkeypatch.setattr(base_wrapper, "_USAGE_BUFFERS", {retired_session: buffer})
+    monkeypatch.setattr(base_wrapper, "active_session_factories", lambda: [])
+
+    buffer.add({"execution_id": "1"})
+    assert buffer._writer.is_alive()
+
+    # A lookup for a new factory retires the old buffer and its writer thread
+    base_wrapper.get_usage_buffer(Mock())
+    buffer._writer.join(timeout=5)
+    assert not buffer._writer.is_alive()
+    retired_session.return_value.commit.assert_called()
@@ -3,12 +3,12 @@ from anthropic import Anthropic, AsyncAnthropic
 from anthropic.types import Message, Usage
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_usage():
     return Usage(input_tokens=10, output_tokens=20)
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_message(mock_usage):
     return Message(
         id="msg_123",
@@ -22,11 +22,11 @@ def mock_message(mock_usage):
     )
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sync_client():
     return Anthropic(api_key="test-key")
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def async_client():
     return AsyncAnthropic(api_key="test-key")
@@ -1,11 +1,8 @@
-import logging
 import pytest
-from unittest.mock import AsyncMock, Mock, patch
-import tempfile
-import os
+from unittest.mock import Mock
+import httpx
 
 from tokenator.anthropic.client_anthropic import tokenator_anthropic
-from tokenator.schemas import TokenUsage
 from sqlalchemy.exc import SQLAlchemyError
 from anthropic.types import (
     Message,
@@ -19,44 +16,79 @@ from anthropic.types import (
 )
 from anthropic import Anthropic, AsyncAnthropic, BadRequestError, RateLimitError
 from tokenator import state
+from tests.unit.helpers import (
+    HELLO_MSGS,
+    INVALID_CLIENT_MSG,
+    assert_usage_logged,
+    async_iter,
+    awaitable,
+    create_with_mock,
+    first_usage,
+    mock_sdk_create,
+    usage_count,
+)
 
-
-@pytest.fixture
-def streaming_chunks():
-    return [
-        RawMessageStartEvent(
-            type="message_start",
-            message=Message(
-                id="msg_1",
-                type="message",
-                role="assistant",
-                content=[],
-                model="claude-3",
-                usage=Usage(input_tokens=10, output_tokens=20),
-                stop_reason=None,
-                stop_sequence=None,
-            ),
-        ),
-        RawContentBlockStartEvent(
-            type="content_block_start",
-            index=0,
-            content_block=TextBlock(type="text", text="Hello"),
-        ),
-        RawContentBlockDeltaEvent(
-            type="content_block_delta",
-            index=0,
-            delta=TextDelta(type="text_delta", text=" world"),
+# Error responses are read-only, so build them once per module
+MOCK_REQUEST = httpx.Request("POST", "https://api.anthropic.com/v1/messages")
+MOCK_RESPONSE_400 = httpx.Response(400, request=MOCK_REQUEST)
+MOCK_RESPONSE_429 = httpx.Response(429, request=MOCK_REQUEST)
+
+# SDK errors the wrappers must propagate without logging usage
+API_ERRORS = [
+    pytest.param(
+        BadRequestError(response=MOCK_RESPONSE_400, body=None, message="Bad Request"),
+        id="bad_request",
+    ),
+    pytest.param(
+        RateLimitError(message="Rate error", response=MOCK_RESPONSE_429, body=None),
+        id="rate_limit",
+    ),
+]
+
+# Stream events are immutable, so build them once without pydantic validation
+STREAM_CHUNKS = (
+    RawMessageStartEvent.model_construct(
+        type="message_start",
+        message=Message.model_construct(
+            id="msg_1",
+            type="message",
+            role="assistant",
+            content=[],
+            model="claude-3",
+            usage=Usage.model_construct(input_tokens=10, output_tokens=20),
+            stop_reason=None,
+            stop_sequence=None,
         ),
-        RawMessageStopEvent(type="message_stop"),
-    ]
-
+    ),
+    RawContentBlockStartEvent.model_construct(
+        type="content_block_start",
+        index=0,
+        content_block=TextBlock.model_construct(type="text", text="Hello"),
+    ),
+    RawContentBlockDeltaEvent.model_construct(
+        type="content_block_delta",
+        index=0,
+        delta=TextDelta.model_construct(type="text_delta", text=" world"),
+    ),
+    RawMessageStopEvent.model_construct(type="message_stop"),
+)
 
-@pytest.fixture
-def temp_db():
-    with tempfile.TemporaryDirectory() as tmpdir:
-        logging.warning(f"temp_db: {tmpdir}")
-        db_path = os.path.join(tmpdir, "tokens.db")
-        yield db_path
+STREAM_CHUNKS_ZERO_USAGE = (
+    RawMessageStartEvent.model_construct(
+        type="message_start",
+        message=Message.model_construct(
+            id="msg_1",
+            type="message",
+            role="assistant",
+            content=[],
+            model="claude-3",
+            usage=Usage.model_construct(input_tokens=0, output_tokens=0),
+            stop_reason=None,
+            stop_sequence=None,
+        ),
+    ),
+    RawMessageStopEvent.model_construct(type="message_stop"),
+)
 
 
 @pytest.fixture
@@ -69,6 +101,27 @@ def test_async_client(async_client, temp_db):
     return tokenator_anthropic(async_client, db_path=temp_db)
 
 
+@pytest.fixture(params=["sync", "async"])
+def test_client(request):
+    """Run a test once against the sync wrapper and once against the async one."""
+    return request.getfixturevalue(f"test_{request.param}_client")
+
+
+@pytest.fixture
+def mock_create(test_sync_client, monkeypatch):
+    return mock_sdk_create(test_sync_client.client.messages, monkeypatch)
+
+
+@pytest.fixture
+def mock_async_create(test_async_client, monkeypatch):
+    return mock_sdk_create(test_async_client.client.messages, monkeypatch)
+
+
+@pytest.fixture
+def mock_client_create(test_client, monkeypatch):
+    return mock_sdk_create(test_client.client.messages, monkeypatch)
+
+
 def test_init_sync_client(test_sync_client, sync_client):
     assert test_sync_client.client == sync_client
 
@@ -78,325 +131,170 @@ def test_init_async_client(test_async_client, async_client):
 
 
 def test_init_invalid_client():
-    with pytest.raises(ValueError, match="Client must be an instance"):
+    with pytest.raises(ValueError, match=INVALID_CLIENT_MSG):
         tokenator_anthropic(Mock())
 
 
-def test_db_path_creation_sync():
-    with tempfile.TemporaryDirectory() as tmpdir:
-        db_path = os.path.join(tmpdir, "test_db", "tokens.db")
-        _ = tokenator_anthropic(Anthropic(api_key="test"), db_path=db_path)
-        assert state.is_tokenator_enabled is True
-        assert os.path.exists(os.path.dirname(db_path))
-
+def test_db_path_creation_sync(skip_migrations, tmp_path):
+    db_path = tmp_path / "test_db" / "tokens.db"
+    _ = tokenator_anthropic(Mock(spec=Anthropic), db_path=str(db_path))
+    assert state.is_tokenator_enabled is True
+    assert db_path.parent.exists()
 
-def test_db_path_creation_async():
-    with tempfile.TemporaryDirectory() as tmpdir:
-        db_path = os.path.join(tmpdir, "test_db", "tokens.db")
-        _ = tokenator_anthropic(AsyncAnthropic(api_key="test"), db_path=db_path)
-        assert state.is_tokenator_enabled is True
-        assert os.path.exists(os.path.dirname(db_path))
 
+def test_db_path_creation_async(skip_migrations, tmp_path):
+    db_path = tmp_path / "test_db" / "tokens.db"
+    _ = tokenator_anthropic(Mock(spec=AsyncAnthropic), db_path=str(db_path))
+    assert state.is_tokenator_enabled is True
+    assert db_path.parent.exists()
 
-@pytest.mark.asyncio
-async def test_async_create_with_usage(test_async_client, mock_message):
-    with patch.object(test_async_client.client.messages, "create") as mock_create:
-        mock_create.return_value = AsyncMock(return_value=mock_message)()
 
-        response = await test_async_client.messages.create(
-            model="claude-3", messages=[{"role": "user", "content": "Hello"}]
-        )
-
-        assert response == mock_message
+async def test_create_with_usage(test_client, mock_client_create, mock_message):
+    response = await create_with_mock(
+        test_client.messages.create, mock_client_create, mock_message, model="claude-3"
+    )
 
-        session = test_async_client.Session()
-        try:
-            usage = session.query(TokenUsage).first()
-            assert usage.provider == "anthropic"
-            assert usage.model == "claude-3"
-            assert usage.prompt_tokens == 10
-            assert usage.completion_tokens == 20
-            assert usage.total_tokens == 30
-        finally:
-            session.close()
+    assert response == mock_message
 
+    assert_usage_logged(test_client, "anthropic", "claude-3")
 
-def test_sync_create_with_usage(test_sync_client, mock_message):
-    with patch.object(test_sync_client.client.messages, "create") as mock_create:
-        mock_create.return_value = mock_message
 
-        response = test_sync_client.messages.create(
-            model="claude-3", messages=[{"role": "user", "content": "Hello"}]
-        )
-
-        assert response == mock_message
-
-        session = test_sync_client.Session()
-        try:
-            usage = session.query(TokenUsage).first()
-            assert usage.provider == "anthropic"
-            assert usage.model == "claude-3"
-            assert usage.prompt_tokens == 10
-            assert usage.completion_tokens == 20
-            assert usage.total_tokens == 30
-        finally:
-            session.close()
-
-
-def test_zero_usage_stats(test_sync_client):
-    mock_msg = Message(
-        id="msg_123",
-        type="message",
-        role="assistant",
-        content=[],
-        model="claude-3",
-        stop_reason="end_turn",
-        usage=Usage(input_tokens=0, output_tokens=0),
+def test_zero_usage_stats(test_sync_client, mock_message, mock_create):
+    # Copy the shared message rather than re-validating a new one
+    mock_msg = mock_message.model_copy(
+        update={"usage": Usage.model_construct(input_tokens=0, output_tokens=0)}
     )
 
-    with patch.object(test_sync_client.client.messages, "create") as mock_create:
-        mock_create.return_value = mock_msg
-
-        _ = test_sync_client.messages.create(
-            model="claude-3", messages=[{"role": "user", "content": "Hello"}]
-        )
+    mock_create.return_value = mock_msg
 
-        session = test_sync_client.Session()
-        try:
-            usage_count = session.query(TokenUsage).first()
-            assert usage_count.prompt_tokens == 0
-            assert usage_count.completion_tokens == 0
-            assert usage_count.total_tokens == 0
-        finally:
-            session.close()
-
-
-def test_db_error_handling(test_sync_client, mock_message):
-    with (
-        patch(
-            "tokenator.anthropic.client_anthropic.BaseAnthropicWrapper._log_usage_impl"
-        ) as mock_log,
-        patch.object(test_sync_client.client.messages, "create") as mock_create,
-    ):
-        mock_create.return_value = mock_message
-        mock_log.side_effect = SQLAlchemyError("DB Error")
+    _ = test_sync_client.messages.create(model="claude-3", messages=HELLO_MSGS)
 
-        response = test_sync_client.messages.create(
-            model="claude-3", messages=[{"role": "user", "content": "Hello"}]
-        )
-        assert response == mock_message
+    usage = first_usage(test_sync_client)
+    assert usage.prompt_tokens == 0
+    assert usage.completion_tokens == 0
+    assert usage.total_tokens == 0
 
 
-def test_api_error_handling(test_sync_client):
-    with patch.object(test_sync_client.client.messages, "create") as mock_create:
-        mock_create.side_effect = BadRequestError(
-            response=Mock(status_code=400), body=None, message="Bad Request"
-        )
+def test_db_error_handling(test_sync_client, mock_message, mock_create, monkeypatch):
+    monkeypatch.setattr(
+        "tokenator.anthropic.client_anthropic.BaseAnthropicWrapper._log_usage_impl",
+        Mock(side_effect=SQLAlchemyError("DB Error")),
+    )
+    mock_create.return_value = mock_message
 
-        with pytest.raises(BadRequestError):
-            test_sync_client.messages.create(
-                model="claude-3", messages=[{"role": "user", "content": "Hello"}]
-            )
+    response = test_sync_client.messages.create(model="claude-3", messages=HELLO_MSGS)
+    assert response == mock_message
 
-        session = test_sync_client.Session()
-        try:
-            assert session.query(TokenUsage).count() == 0
-        finally:
-            session.close()
 
+@pytest.mark.parametrize("error", API_ERRORS)
+async def test_api_error_handling(test_client, mock_client_create, error):
+    mock_client_create.side_effect = error
 
-def test_rate_limit_error(test_sync_client):
-    with patch.object(test_sync_client.messages, "create") as mock_create:
-        mock_create.side_effect = RateLimitError(
-            message="Rate error", response=Mock(status_code=429), body=None
+    with pytest.raises(type(error)) as exc_info:
+        await create_with_mock(
+            test_client.messages.create, mock_client_create, model="claude-3"
         )
+    # The wrapper re-raises the SDK's own exception rather than wrapping it
+    assert exc_info.value is error
 
-        with pytest.raises(RateLimitError):
-            test_sync_client.messages.create(
-                model="claude-3", messages=[{"role": "user", "content": "Hello"}]
-            )
+    assert usage_count(test_client) == 0
 
 
-@pytest.mark.asyncio
-async def test_log_usage_auto_generates_uuid(test_async_client, mock_message):
-    with patch.object(test_async_client.client.messages, "create") as mock_create:
-        mock_create.return_value = AsyncMock(return_value=mock_message)()
+async def test_log_usage_auto_generates_uuid(
+    test_async_client, mock_message, mock_async_create
+):
+    mock_async_create.return_value = awaitable(mock_message)
 
-        _ = await test_async_client.messages.create(
-            model="claude-3", messages=[{"role": "user", "content": "Hello"}]
-        )
+    _ = await test_async_client.messages.create(model="claude-3", messages=HELLO_MSGS)
 
-        session = test_async_client.Session()
-        try:
-            usage = session.query(TokenUsage).first()
-            assert usage.execution_id is not None
-        finally:
-            session.close()
+    usage = first_usage(test_async_client)
+    assert usage.execution_id is not None
 
 
-@pytest.mark.asyncio
-async def test_custom_execution_id(test_async_client, mock_message):
+async def test_custom_execution_id(test_client, mock_client_create, mock_message):
     custom_id = "test-execution-123"
 
-    with patch.object(test_async_client.client.messages, "create") as mock_create:
-        mock_create.return_value = AsyncMock(return_value=mock_message)()
-
-        _ = await test_async_client.messages.create(
-            model="claude-3",
-            messages=[{"role": "user", "content": "Hello"}],
-            execution_id=custom_id,
-        )
-
-        session = test_async_client.Session()
-        try:
-            usage = session.query(TokenUsage).first()
-            assert usage.execution_id == custom_id
-        finally:
-            session.close()
-
+    await create_with_mock(
+        test_client.messages.create,
+        mock_client_create,
+        mock_message,
+        execution_id=custom_id,
+        model="claude-3",
+    )
 
-def test_custom_execution_id_sync(test_sync_client, mock_message):
-    custom_id = "test-execution-123"
+    usage = assert_usage_logged(test_client, "anthropic", "claude-3")
+    assert usage.execution_id == custom_id
 
-    with patch.object(test_sync_client.client.messages, "create") as mock_create:
-        mock_create.return_value = mock_message
 
-        _ = test_sync_client.messages.create(
-            model="claude-3",
-            messages=[{"role": "user", "content": "Hello"}],
-            execution_id=custom_id,
-        )
+async def test_async_streaming(test_async_client, mock_async_create):
+    # Set up the mock to return our stream directly
+    mock_async_create.return_value = awaitable(async_iter(STREAM_CHUNKS))
 
-        session = test_sync_client.Session()
-        try:
-            usage = session.query(TokenUsage).first()
-            assert usage.execution_id == custom_id
-        finally:
-            session.close()
+    collected_chunks = []
+    stream = await test_async_client.messages.create(
+        model="claude-3",
+        messages=HELLO_MSGS,
+        stream=True,
+    )
+    async for chunk in stream:
+        collected_chunks.append(chunk)
 
+    assert len(collected_chunks) == 4
 
-@pytest.mark.asyncio
-async def test_async_streaming(test_async_client, streaming_chunks):
-    with patch.object(test_async_client.client.messages, "create") as mock_create:
+    # The whole stream is written as a single row in one commit
+    assert usage_count(test_async_client) == 1
+    usage = first_usage(test_async_client)
+    assert usage is not None
+    assert usage.total_tokens == 30
 
-        class ChunkStream:
-            def __init__(self, chunks):
-                self.chunks = chunks
-                self.index = 0
 
-            def __aiter__(self):
-                return self
+def test_sync_streaming(test_sync_client, mock_create):
+    mock_create.return_value = iter(STREAM_CHUNKS)
 
-            async def __anext__(self):
-                if self.index >= len(self.chunks):
-                    raise StopAsyncIteration
-                chunk = self.chunks[self.index]
-                self.index += 1
-                return chunk
+    collected_chunks = []
+    for chunk in test_sync_client.messages.create(
+        model="claude-3",
+        messages=HELLO_MSGS,
+        stream=True,
+    ):
+        collected_chunks.append(chunk)
 
-        # Set up the mock to return our stream directly
-        mock_create.return_value = AsyncMock(
-            return_value=ChunkStream(streaming_chunks)
-        )()
+    assert len(collected_chunks) == 4
 
-        collected_chunks = []
-        stream = await test_async_client.messages.create(
-            model="claude-3",
-            messages=[{"role": "user", "content": "Hello"}],
-            stream=True,
-        )
-        async for chunk in stream:
-            collected_chunks.append(chunk)
+    # The whole stream is written as a single row in one commit
+    assert usage_count(test_sync_client) == 1
+    usage = first_usage(test_sync_client)
+    assert usage is not None
+    assert usage.total_tokens == 30
 
-        assert len(collected_chunks) == 4
 
-        session = test_async_client.Session()
-        try:
-            usage = session.query(TokenUsage).first()
-            assert usage is not None
-            assert usage.total_tokens == 30
-        finally:
-            session.close()
+def test_streaming_zero_usage(test_sync_client, mock_create):
+    mock_create.return_value = iter(STREAM_CHUNKS_ZERO_USAGE)
 
+    collected_chunks = []
+    for chunk in test_sync_client.messages.create(
+        model="claude-3",
+        messages=HELLO_MSGS,
+        stream=True,
+    ):
+        collected_chunks.append(chunk)
 
-def test_sync_streaming(test_sync_client, streaming_chunks):
-    with patch.object(test_sync_client.client.messages, "create") as mock_create:
-        mock_create.return_value = iter(streaming_chunks)
+    assert usage_count(test_sync_client) == 1
+    usage = first_usage(test_sync_client)
+    assert usage.total_tokens == 0
 
-        collected_chunks = []
-        for chunk in test_sync_client.messages.create(
-            model="claude-3",
-            messages=[{"role": "user", "content": "Hello"}],
-            stream=True,
-        ):
-            collected_chunks.append(chunk)
-
-        assert len(collected_chunks) == 4
-
-        session = test_sync_client.Session()
-        try:
-            usage = session.query(TokenUsage).first()
-            assert usage is not None
-            assert usage.total_tokens == 30
-        finally:
-            session.close()
-
-
-def test_streaming_zero_usage(test_sync_client):
-    chunks = [
-        RawMessageStartEvent(
-            type="message_start",
-            message=Message(
-                id="msg_1",
-                type="message",
-                role="assistant",
-                content=[],
-                model="claude-3",
-                usage=Usage(input_tokens=0, output_tokens=0),
-                stop_reason=None,
-                stop_sequence=None,
-            ),
-        ),
-        RawMessageStopEvent(type="message_stop"),
-    ]
 
-    with patch.object(test_sync_client.client.messages, "create") as mock_create:
-        mock_create.return_value = iter(chunks)
+async def test_streaming_with_error(test_async_client, mock_async_create):
+    mock_async_create.side_effect = RateLimitError(
+        message="Rate limit exceeded", response=MOCK_RESPONSE_429, body=None
+    )
 
-        collected_chunks = []
-        for chunk in test_sync_client.messages.create(
+    with pytest.raises(RateLimitError):
+        async for chunk in await test_async_client.messages.create(
             model="claude-3",
-            messages=[{"role": "user", "content": "Hello"}],
+            messages=HELLO_MSGS,
             stream=True,
         ):
-            collected_chunks.append(chunk)
-
-        session = test_sync_client.Session()
-        try:
-            assert session.query(TokenUsage).count() == 1
-            usage = session.query(TokenUsage).first()
-            assert usage.total_tokens == 0
-        finally:
-            session.close()
-
-
-@pytest.mark.asyncio
-async def test_streaming_with_error(test_async_client):
-    with patch.object(test_async_client.client.messages, "create") as mock_create:
-        mock_create.side_effect = RateLimitError(
-            message="Rate limit exceeded", response=Mock(status_code=429), body=None
-        )
+            pass
 
-        with pytest.raises(RateLimitError):
-            async for chunk in await test_async_client.messages.create(
-                model="claude-3",
-                messages=[{"role": "user", "content": "Hello"}],
-                stream=True,
-            ):
-                pass
-
-        session = test_async_client.Session()
-        try:
-            assert session.query(TokenUsage).count() == 0
-        finally:
-            session.close()
+    assert usage_count(test_async_client) == 0
@@ -4,12 +4,12 @@ from openai.types.chat import ChatCompletion
 from openai.types import CompletionUsage
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_usage():
     return CompletionUsage(prompt_tokens=10, completion_tokens=20, total_tokens=30)
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_chat_completion(mock_usage):
     return ChatCompletion(
         id="chatcmpl-123",
@@ -21,11 +21,11 @@ def mock_chat_completion(mock_usage):
     )
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sync_client():
     return OpenAI(api_key="test-key")
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def async_client():
     return AsyncOpenAI(api_key="test-key")
@@ -1,23 +1,77 @@
 import pytest
-from unittest.mock import AsyncMock, Mock, patch
-import tempfile
-import os
+from unittest.mock import Mock
+import httpx
 
 from tokenator.openai.client_openai import tokenator_openai
-from tokenator.schemas import TokenUsage
 from sqlalchemy.exc import SQLAlchemyError
-from openai.types.chat import ChatCompletion, ChatCompletionChunk
+from openai.types.chat import ChatCompletionChunk
 from openai.types.completion_usage import CompletionUsage
 from openai import APIConnectionError, RateLimitError
+from tests.unit.helpers import (
+    HELLO_MSGS,
+    INVALID_CLIENT_MSG,
+    assert_usage_logged,
+    async_iter,
+    awaitable,
+    create_with_mock,
+    first_usage,
+    mock_sdk_create,
+    usage_count,
+)
 from openai import OpenAI, AsyncOpenAI
 
+# Error requests/responses are read-only, so build them once per module
+MOCK_REQUEST = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+MOCK_RESPONSE = httpx.Response(429, request=MOCK_REQUEST)
+
+# SDK errors the wrappers must propagate without logging usage
+API_ERRORS = [
+    pytest.param(
+        APIConnectionError(message="API Error", request=MOCK_REQUEST), id="connection"
+    ),
+    pytest.param(
+        RateLimitError(message="Rate error", body={}, response=MOCK_RESPONSE),
+        id="rate_limit",
+    ),
+]
+
+
+def _chunk(chunk_id, usage=None):
+    return ChatCompletionChunk.model_construct(
+        id=chunk_id,
+        choices=[],
+        model="gpt-4",
+        object="chat.completion.chunk",
+        created=1,
+        usage=usage,
+    )
 
-@pytest.fixture
-def temp_db():
-    with tempfile.TemporaryDirectory() as tmpdir:
-        db_path = os.path.join(tmpdir, "test_tokens.db")
-        yield db_path
-    # Auto-cleanup when test ends
+
+# Stream chunks are immutable, so build them once without pydantic validation
+CHUNK_USAGE = CompletionUsage.model_construct(
+    prompt_tokens=10, completion_tokens=20, total_tokens=30
+)
+STREAM_CHUNKS = (_chunk("1"), _chunk("2"), _chunk("3", CHUNK_USAGE))
+STREAM_CHUNKS_INCLUDE_USAGE = tuple(_chunk(i, CHUNK_USAGE) for i in ("1", "2", "3"))
+STREAM_CHUNKS_NO_USAGE = (_chunk("1"), _chunk("2"))
+
+# Canned streams and the total tokens each should log (None: nothing logged)
+STREAM_CASES = {
+    "trailing_usage": (STREAM_CHUNKS, 30),
+    "per_chunk_usage": (STREAM_CHUNKS_INCLUDE_USAGE, 90),
+    "no_usage": (STREAM_CHUNKS_NO_USAGE, None),
+    "empty": ((), None),
+}
+
+
+def _assert_stream_logged(client, expected_total):
+    """Assert a drained stream logged expected_total tokens, or nothing if None."""
+    if expected_total is None:
+        assert usage_count(client) == 0
+        return
+    # The whole stream is written as a single row in one commit
+    assert usage_count(client) == 1
+    assert first_usage(client).total_tokens == expected_total
 
 
 @pytest.fixture
@@ -30,158 +84,111 @@ def test_async_client(async_client, temp_db):
     return tokenator_openai(async_client, db_path=temp_db)
 
 
-def test_init_sync_client(test_sync_client, sync_client):
-    assert test_sync_client.client == sync_client
+@pytest.fixture(params=["sync", "async"])
+def test_client(request):
+    """Run a test once against the sync wrapper and once against the async one."""
+    return request.getfixturevalue(f"test_{request.param}_client")
 
 
-def test_init_async_client(test_async_client, async_client):
-    assert test_async_client.client == async_client
+@pytest.fixture(params=list(STREAM_CASES))
+def stream_case(request):
+    return STREAM_CASES[request.param]
 
 
-def test_init_invalid_client():
-    with pytest.raises(ValueError, match="Client must be an instance"):
-        tokenator_openai(Mock())
+@pytest.fixture
+def mock_create(test_sync_client, monkeypatch):
+    return mock_sdk_create(test_sync_client.client.chat.completions, monkeypatch)
 
 
-def test_db_path_creation_sync():
-    with tempfile.TemporaryDirectory() as tmpdir:
-        db_path = os.path.join(tmpdir, "test_db", "tokens.db")
-        _ = tokenator_openai(OpenAI(api_key="test"), db_path=db_path)
-        assert os.path.exists(os.path.dirname(db_path))
+@pytest.fixture
+def mock_async_create(test_async_client, monkeypatch):
+    return mock_sdk_create(test_async_client.client.chat.completions, monkeypatch)
 
 
-def test_db_path_creation_async():
-    with tempfile.TemporaryDirectory() as tmpdir:
-        db_path = os.path.join(tmpdir, "test_db", "tokens.db")
-        _ = tokenator_openai(AsyncOpenAI(api_key="test"), db_path=db_path)
-        assert os.path.exists(os.path.dirname(db_path))
+@pytest.fixture
+def mock_client_create(test_client, monkeypatch):
+    return mock_sdk_create(test_client.client.chat.completions, monkeypatch)
 
 
-@pytest.mark.asyncio
-async def test_async_create_with_usage(test_async_client, mock_chat_completion):
-    with patch.object(
-        test_async_client.client.chat.completions, "create"
-    ) as mock_create:
-        mock_create.return_value = AsyncMock(return_value=mock_chat_completion)()
+def test_init_sync_client(test_sync_client, sync_client):
+    assert test_sync_client.client == sync_client
 
-        response = await test_async_client.chat.completions.create(
-            model="gpt-4o", messages=[{"role": "user", "content": "Hello"}]
-        )
 
-        assert response == mock_chat_completion
+def test_init_async_client(test_async_client, async_client):
+    assert test_async_client.client == async_client
 
-        session = test_async_client.Session()
-        try:
-            usage = session.query(TokenUsage).first()
-            assert usage.provider == "openai"
-            assert usage.model == "gpt-4o"
-            assert usage.prompt_tokens == 10
-            assert usage.completion_tokens == 20
-            assert usage.total_tokens == 30
-        finally:
-            session.close()
 
+def test_init_invalid_client():
+    with pytest.raises(ValueError, match=INVALID_CLIENT_MSG):
+        tokenator_openai(Mock())
 
-def test_sync_create_with_usage(test_sync_client, mock_chat_completion):
-    with patch.object(
-        test_sync_client.client.chat.completions, "create"
-    ) as mock_create:
-        mock_create.return_value = mock_chat_completion
 
-        response = test_sync_client.create(
-            model="gpt-4o", messages=[{"role": "user", "content": "Hello"}]
-        )
+def test_db_path_creation_sync(skip_migrations, tmp_path):
+    db_path = tmp_path / "test_db" / "tokens.db"
+    _ = tokenator_openai(Mock(spec=OpenAI), db_path=str(db_path))
+    assert db_path.parent.exists()
 
-        assert response == mock_chat_completion
 
-        session = test_sync_client.Session()
-        try:
-            usage = session.query(TokenUsage).first()
-            assert usage.provider == "openai"
-            assert usage.model == "gpt-4o"
-            assert usage.prompt_tokens == 10
-            assert usage.completion_tokens == 20
-            assert usage.total_tokens == 30
-        finally:
-            session.close()
+def test_db_path_creation_async(skip_migrations, tmp_path):
+    db_path = tmp_path / "test_db" / "tokens.db"
+    _ = tokenator_openai(Mock(spec=AsyncOpenAI), db_path=str(db_path))
+    assert db_path.parent.exists()
 
 
-def test_missing_usage_stats(test_sync_client):
-    mock_completion = ChatCompletion(
-        id="chatcmpl-123",
+async def test_create_with_usage(test_client, mock_client_create, mock_chat_completion):
+    response = await create_with_mock(
+        test_client.chat.completions.create,
+        mock_client_create,
+        mock_chat_completion,
         model="gpt-4o",
-        object="chat.completion",
-        created=1677858242,
-        choices=[],
-        usage=None,
     )
 
-    with patch.object(
-        test_sync_client.client.chat.completions, "create"
-    ) as mock_create:
-        mock_create.return_value = mock_completion
+    assert response == mock_chat_completion
 
-        _ = test_sync_client.chat.completions.create(
-            model="gpt-4o", messages=[{"role": "user", "content": "Hello"}]
-        )
+    assert_usage_logged(test_client, "openai", "gpt-4o")
 
-        session = test_sync_client.Session()
-        try:
-            usage_count = session.query(TokenUsage).count()
-            assert usage_count == 0
-        finally:
-            session.close()
-
-
-def test_db_error_handling(test_sync_client, mock_chat_completion):
-    with (
-        patch(
-            "tokenator.openai.client_openai.BaseOpenAIWrapper._log_usage_impl"
-        ) as mock_log,
-        patch.object(test_sync_client.client.chat.completions, "create") as mock_create,
-    ):
-        mock_create.return_value = mock_chat_completion
-        mock_log.side_effect = SQLAlchemyError("DB Error")
-
-        response = test_sync_client.chat.completions.create(
-            model="gpt-4o", messages=[{"role": "user", "content": "Hello"}]
-        )
-        assert response == mock_chat_completion
 
+def test_missing_usage_stats(test_sync_client, mock_chat_completion, mock_create):
+    # Copy the shared completion rather than re-validating a new one
+    mock_completion = mock_chat_completion.model_copy(update={"usage": None})
 
-def test_api_error_handling(test_sync_client):
-    with patch.object(
-        test_sync_client.client.chat.completions, "create"
-    ) as mock_create:
-        mock_create.side_effect = APIConnectionError(
-            message="API Error", request=Mock()
-        )
+    mock_create.return_value = mock_completion
 
-        with pytest.raises(APIConnectionError):
-            test_sync_client.chat.completions.create(
-                model="gpt-4o", messages=[{"role": "user", "content": "Hello"}]
-            )
+    _ = test_sync_client.chat.completions.create(model="gpt-4o", messages=HELLO_MSGS)
 
-        session = test_sync_client.Session()
-        try:
-            assert session.query(TokenUsage).count() == 0
-        finally:
-            session.close()
+    assert usage_count(test_sync_client) == 0
 
 
-def test_rate_limit_error(test_sync_client):
-    with patch.object(test_sync_client.chat.completions, "create") as mock_create:
-        mock_create.side_effect = RateLimitError(
-            message="Rate error", body={}, response=Mock()
+def test_db_error_handling(
+    test_sync_client, mock_chat_completion, mock_create, monkeypatch
+):
+    monkeypatch.setattr(
+        "tokenator.openai.client_openai.BaseOpenAIWrapper._log_usage_impl",
+        Mock(side_effect=SQLAlchemyError("DB Error")),
+    )
+    mock_create.return_value = mock_chat_completion
+
+    response = test_sync_client.chat.completions.create(
+        model="gpt-4o", messages=HELLO_MSGS
+    )
+    assert response == mock_chat_completion
+
+
+@pytest.mark.parametrize("error", API_ERRORS)
+async def test_api_error_handling(test_client, mock_client_create, error):
+    mock_client_create.side_effect = error
+
+    with pytest.raises(type(error)) as exc_info:
+        await create_with_mock(
+            test_client.chat.completions.create, mock_client_create, model="gpt-4o"
         )
+    # The wrapper re-raises the SDK's own exception rather than wrapping it
+    assert exc_info.value is error
 
-        with pytest.raises(RateLimitError):
-            test_sync_client.chat.completions.create(
-                model="gpt-4o", messages=[{"role": "user", "content": "Hello"}]
-            )
+    assert usage_count(test_client) == 0
 
 
-def test_malformed_response(test_sync_client):
+def test_malformed_response(test_sync_client, monkeypatch):
     malformed_completion = {
         "id": "chatcmpl-123",
         "model": "gpt-4o",
@@ -196,347 +203,118 @@ def test_malformed_response(test_sync_client):
         },
     }
 
-    with patch.object(test_sync_client.chat.completions, "create") as mock_create:
-        mock_create.return_value = malformed_completion
+    monkeypatch.setattr(
+        test_sync_client.chat.completions,
+        "create",
+        Mock(return_value=malformed_completion),
+    )
 
-        response = test_sync_client.chat.completions.create(
-            model="gpt-4o", messages=[{"role": "user", "content": "Hello"}]
-        )
+    response = test_sync_client.chat.completions.create(
+        model="gpt-4o", messages=HELLO_MSGS
+    )
 
-        # Should still return response but not log usage
-        assert response == malformed_completion
+    # Should still return response but not log usage
+    assert response == malformed_completion
 
-        session = test_sync_client.Session()
-        try:
-            assert session.query(TokenUsage).count() == 0
-        finally:
-            session.close()
+    assert usage_count(test_sync_client) == 0
 
 
-@pytest.mark.asyncio
-async def test_log_usage_auto_generates_uuid(test_async_client, mock_chat_completion):
-    with patch.object(
-        test_async_client.client.chat.completions, "create"
-    ) as mock_create:
-        mock_create.return_value = AsyncMock(return_value=mock_chat_completion)()
+async def test_log_usage_auto_generates_uuid(
+    test_async_client, mock_chat_completion, mock_async_create
+):
+    mock_async_create.return_value = awaitable(mock_chat_completion)
 
-        _ = await test_async_client.chat.completions.create(
-            model="gpt-4o", messages=[{"role": "user", "content": "Hello"}]
-        )
+    _ = await test_async_client.chat.completions.create(
+        model="gpt-4o", messages=HELLO_MSGS
+    )
 
-        session = test_async_client.Session()
-        try:
-            usage = session.query(TokenUsage).first()
-            assert usage.execution_id is not None
-        finally:
-            session.close()
+    usage = first_usage(test_async_client)
+    assert usage.execution_id is not None
 
 
-@pytest.mark.asyncio
-async def test_custom_execution_id(test_async_client, mock_chat_completion):
+async def test_custom_execution_id(
+    test_client, mock_client_create, mock_chat_completion
+):
     custom_id = "test-execution-123"
 
-    with patch.object(
-        test_async_client.client.chat.completions, "create"
-    ) as mock_create:
-        mock_create.return_value = AsyncMock(return_value=mock_chat_completion)()
-
-        _ = await test_async_client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "user", "content": "Hello"}],
-            execution_id=custom_id,
-        )
+    await create_with_mock(
+        test_client.chat.completions.create,
+        mock_client_create,
+        mock_chat_completion,
+        execution_id=custom_id,
+        model="gpt-4o",
+    )
 
-        session = test_async_client.Session()
-        try:
-            usage = session.query(TokenUsage).first()
-            assert usage.execution_id == custom_id
-        finally:
-            session.close()
+    usage = assert_usage_logged(test_client, "openai", "gpt-4o")
+    assert usage.execution_id == custom_id
 
 
-def test_custom_execution_id_sync(test_sync_client, mock_chat_completion):
-    custom_id = "test-execution-123"
+async def test_async_streaming(test_async_client, mock_async_create, stream_case):
+    chunks, expected_total = stream_case
+    mock_async_create.return_value = awaitable(async_iter(chunks))
 
-    with patch.object(
-        test_sync_client.client.chat.completions, "create"
-    ) as mock_create:
-        mock_create.return_value = mock_chat_completion
+    stream = await test_async_client.chat.completions.create(
+        model="gpt-4", messages=HELLO_MSGS, stream=True
+    )
+    collected_chunks = [chunk async for chunk in stream]
 
-        _ = test_sync_client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "user", "content": "Hello"}],
-            execution_id=custom_id,
-        )
+    assert collected_chunks == list(chunks)
+    _assert_stream_logged(test_async_client, expected_total)
 
-        session = test_sync_client.Session()
-        try:
-            usage = session.query(TokenUsage).first()
-            assert usage.execution_id == custom_id
-        finally:
-            session.close()
 
+def test_sync_streaming(test_sync_client, mock_create, stream_case):
+    chunks, expected_total = stream_case
+    mock_create.return_value = iter(chunks)
 
-@pytest.mark.asyncio
-async def test_async_streaming(test_async_client, mock_chat_completion):
-    chunks = [
-        ChatCompletionChunk(
-            id="1",
-            choices=[],
-            model="gpt-4",
-            object="chat.completion.chunk",
-            created=1,
-            usage=None,
-        ),
-        ChatCompletionChunk(
-            id="2",
-            choices=[],
-            model="gpt-4",
-            object="chat.completion.chunk",
-            created=1,
-            usage=None,
-        ),
-        ChatCompletionChunk(
-            id="3",
-            choices=[],
-            model="gpt-4",
-            object="chat.completion.chunk",
-            created=1,
-            usage=CompletionUsage(
-                prompt_tokens=10, completion_tokens=20, total_tokens=30
-            ),
-        ),
-    ]
-
-    with patch.object(
-        test_async_client.client.chat.completions, "create"
-    ) as mock_create:
-        # Create an async iterator class for the chunks
-        class ChunkStream:
-            def __init__(self, chunks):
-                self.chunks = chunks
-                self.index = 0
-
-            def __aiter__(self):
-                return self
-
-            async def __anext__(self):
-                if self.index >= len(self.chunks):
-                    raise StopAsyncIteration
-                chunk = self.chunks[self.index]
-                self.index += 1
-                return chunk
-
-        # Set up the mock to return our stream directly
-        mock_create.return_value = AsyncMock(return_value=ChunkStream(chunks))()
-
-        collected_chunks = []
-        stream = await test_async_client.chat.completions.create(
-            model="gpt-4", messages=[{"role": "user", "content": "Hello"}], stream=True
+    collected_chunks = list(
+        test_sync_client.chat.completions.create(
+            model="gpt-4", messages=HELLO_MSGS, stream=True
         )
+    )
 
-        async for chunk in stream:
-            collected_chunks.append(chunk)
-
-        assert len(collected_chunks) == 3
-
-        session = test_async_client.Session()
-        try:
-            usage = session.query(TokenUsage).first()
-            assert usage is not None
-            assert usage.total_tokens == 30
-        finally:
-            session.close()
-
-
-def test_sync_streaming(test_sync_client, mock_chat_completion):
-    chunks = [
-        ChatCompletionChunk(
-            id="1",
-            choices=[],
-            model="gpt-4",
-            object="chat.completion.chunk",
-            created=1,
-            usage=None,
-        ),
-        ChatCompletionChunk(
-            id="2",
-            choices=[],
-            model="gpt-4",
-            object="chat.completion.chunk",
-            created=1,
-            usage=None,
-        ),
-        ChatCompletionChunk(
-            id="3",
-            choices=[],
-            model="gpt-4",
-            object="chat.completion.chunk",
-            created=1,
-            usage=CompletionUsage(
-                prompt_tokens=10, completion_tokens=20, total_tokens=30
-            ),
-        ),
-    ]
-
-    with patch.object(
-        test_sync_client.client.chat.completions, "create"
-    ) as mock_create:
-        mock_create.return_value = iter(chunks)
-
-        collected_chunks = []
-        for chunk in test_sync_client.chat.completions.create(
-            model="gpt-4", messages=[{"role": "user", "content": "Hello"}], stream=True
-        ):
-            collected_chunks.append(chunk)
-
-        assert len(collected_chunks) == 3
+    assert collected_chunks == list(chunks)
+    _assert_stream_logged(test_sync_client, expected_total)
 
-        session = test_sync_client.Session()
-        try:
-            usage = session.query(TokenUsage).first()
-            assert usage is not None
-            assert usage.total_tokens == 30
-        finally:
-            session.close()
 
+def test_streaming_reiteration_logs_once(test_sync_client, mock_create):
+    mock_create.return_value = iter(STREAM_CHUNKS[-1:])
 
-def test_sync_streaming_with_include_usage(test_sync_client, mock_chat_completion):
-    chunks = [
-        ChatCompletionChunk(
-            id="1",
-            choices=[],
-            model="gpt-4",
-            object="chat.completion.chunk",
-            created=1,
-            usage=CompletionUsage(
-                prompt_tokens=10, completion_tokens=20, total_tokens=30
-            ),
-        ),
-        ChatCompletionChunk(
-            id="2",
-            choices=[],
-            model="gpt-4",
-            object="chat.completion.chunk",
-            created=1,
-            usage=CompletionUsage(
-                prompt_tokens=10, completion_tokens=20, total_tokens=30
-            ),
-        ),
-        ChatCompletionChunk(
-            id="3",
-            choices=[],
-            model="gpt-4",
-            object="chat.completion.chunk",
-            created=1,
-            usage=CompletionUsage(
-                prompt_tokens=10, completion_tokens=20, total_tokens=30
-            ),
-        ),
-    ]
-
-    with patch.object(
-        test_sync_client.client.chat.completions, "create"
-    ) as mock_create:
-        mock_create.return_value = iter(chunks)
-
-        collected_chunks = []
-        for chunk in test_sync_client.chat.completions.create(
-            model="gpt-4", messages=[{"role": "user", "content": "Hello"}], stream=True
-        ):
-            collected_chunks.append(chunk)
+    stream = test_sync_client.chat.completions.create(
+        model="gpt-4", messages=HELLO_MSGS, stream=True
+    )
+    assert len(list(stream)) == 1
+    # Iterating an exhausted stream must not log the usage a second time
+    assert list(stream) == []
 
-        assert len(collected_chunks) == 3
+    assert usage_count(test_sync_client) == 1
 
-        session = test_sync_client.Session()
-        try:
-            usage = session.query(TokenUsage).first()
-            assert usage is not None
-            assert usage.total_tokens == 90
-        finally:
-            session.close()
 
+async def test_streaming_with_error(test_async_client, mock_async_create):
+    mock_async_create.side_effect = RateLimitError(
+        message="Rate limit exceeded", body={}, response=MOCK_RESPONSE
+    )
 
-def test_streaming_no_final_usage(test_sync_client):
-    # Test when no chunk has usage stats
-    chunks = [
-        ChatCompletionChunk(
-            id="1",
-            choices=[],
+    with pytest.raises(RateLimitError):
+        async for chunk in await test_async_client.chat.completions.create(
             model="gpt-4",
-            object="chat.completion.chunk",
-            created=1,
-            usage=None,
-        ),
-        ChatCompletionChunk(
-            id="2",
-            choices=[],
-            model="gpt-4",
-            object="chat.completion.chunk",
-            created=1,
-            usage=None,
-        ),
-    ]
-
-    with patch.object(
-        test_sync_client.client.chat.completions, "create"
-    ) as mock_create:
-        mock_create.return_value = iter(chunks)
-
-        collected_chunks = []
-        for chunk in test_sync_client.chat.completions.create(
-            model="gpt-4", messages=[{"role": "user", "content": "Hello"}], stream=True
+            messages=HELLO_MSGS,
+            stream=True,
         ):
-            collected_chunks.append(chunk)
-
-        session = test_sync_client.Session()
-        try:
-            assert session.query(TokenUsage).count() == 0
-        finally:
-            session.close()
-
+            pass
 
-def test_streaming_empty_response(test_sync_client):
-    # Test with empty stream
-    with patch.object(
-        test_sync_client.client.chat.completions, "create"
-    ) as mock_create:
-        mock_create.return_value = iter([])
-
-        collected_chunks = []
-        for chunk in test_sync_client.chat.completions.create(
-            model="gpt-4", messages=[{"role": "user", "content": "Hello"}], stream=True
-        ):
-            collected_chunks.append(chunk)
+    assert usage_count(test_async_client) == 0
 
-        assert len(collected_chunks) == 0
 
-        session = test_sync_client.Session()
-        try:
-            assert session.query(TokenUsage).count() == 0
-        finally:
-            session.close()
+async def test_streaming_error_mid_stream(test_async_client, mock_async_create):
+    error = APIConnectionError(message="Connection dropped", request=MOCK_REQUEST)
+    mock_async_create.return_value = awaitable(async_iter((*STREAM_CHUNKS, error)))
 
+    stream = await test_async_client.chat.completions.create(
+        model="gpt-4", messages=HELLO_MSGS, stream=True
+    )
+    with pytest.raises(APIConnectionError):
+        async for chunk in stream:
+            pass
 
-@pytest.mark.asyncio
-async def test_streaming_with_error(test_async_client):
-    with patch.object(
-        test_async_client.client.chat.completions, "create"
-    ) as mock_create:
-        mock_create.side_effect = RateLimitError(
-            message="Rate limit exceeded", body={}, response=Mock()
-        )
-
-        with pytest.raises(RateLimitError):
-            async for chunk in await test_async_client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": "Hello"}],
-                stream=True,
-            ):
-                pass
-
-        session = test_async_client.Session()
-        try:
-            assert session.query(TokenUsage).count() == 0
-        finally:
-            session.close()
+    # The stream never finished, so its usage is never logged
+    assert usage_count(test_async_client) == 0